@@ -1 +1 @@
-from . import models , controller, report
\ No newline at end of file
+from . import models , controller, report, wizard
\ No newline at end of file
@@ -2,6 +2,7 @@
     'name': 'bill_management_system',  # Module name
     'author': 'M.Ahsan',  # Author name
     'maintainer': 'M.Rizwan',
+    'version': '18.0.1.2',
     'category': 'BSS',  # Category displayed in info
     'website': 'https://ahsan-developer.netlify.app',  # Website displayed in info
     'depends': ['base', 'sale', 'sale_subscription', 'account', 'account_accountant','website','portal'],  # Dependencies
@@ -9,8 +10,20 @@
     'application': True,
     "license": "LGPL-3",
     'data': [
-        # 'security/ir.model.access.csv',
+        'security/ir.model.access.csv',
         'report/ebill_report_temp.xml',
+        'data/meter_reading_data.xml',
+        'data/bill_print_run_data.xml',
+        'data/bill_job_data.xml',
+        'data/meter_consumption_summary_data.xml',
+        'data/late_payment_surcharge_data.xml',
+        'wizard/bill_import_wizard_views.xml',
+        'views/meter_reading_views.xml',
+        'views/bill_print_run_views.xml',
+        'views/bill_job_views.xml',
+        'views/meter_consumption_summary_views.xml',
+        'views/meter_reading_upload_views.xml',
+        'views/bill_tariff_views.xml',
         'views/invoice_inherit_views.xml',
         'views/res_partner_inherit_views.xml',
         'views/electric_bill_controller_views.xml',
@@ -1,102 +1,55 @@
-import base64
-from odoo import http, fields, _
+import json
+from odoo import api, http, fields, _
 from odoo.exceptions import ValidationError
 from odoo.http import request
+from odoo.tools import split_every
+
+PARTNER_SEARCH_LIMIT = 20
+# Uploaded readings are validated and turned into draft bills this many at a time
+READING_UPLOAD_BATCH_SIZE = 200
 
 
 class CreateBillRecord(http.Controller):
     @http.route('/create/electric/bill', type='http', auth='user', website=True, methods=['GET', 'POST'], csrf=True)
     def CreateElectricBill(self, **post):
-        res_partner_list = []
-        partner_recs = request.env['res.partner'].sudo().search([])
-        for partner in partner_recs:
-            res_partner_list.append({
-                'id': partner.id, 'name': partner.name, 'meter_id': partner.meter_id,
-                'reference_no': partner.reference_no, 'previous_reading_unit': partner.partner_previous_reading,
-            })
-
         if request.httprequest.method == 'POST':
             partner_id = int(post.get('partner_id'))
-            meter_id = post.get('meter_id')
-            reference_no = post.get('reference_no')
             next_reading_value = float(post.get('next_reading_value'))
             billing_month = fields.Date.from_string(post.get('billing_month')) if post.get('billing_month') else False
             reading_date = fields.Date.from_string(post.get('reading_date')) if post.get('reading_date') else False
             issue_date = fields.Date.from_string(post.get('issue_date')) if post.get('issue_date') else False
             due_date = fields.Date.from_string(post.get('due_date')) if post.get('due_date') else False
 
-            # Image Field
+            # Image Field: kept in an attachment until the job moves it onto the bill, so the
+            # job payload stays small
             image_file = request.httprequest.files.get('image_1920')
-            image_base64 = False
-            image_base64 = base64.b64encode(image_file.read()) if image_file else False
-
-            # Line Data
-            invoice_lines = []
-
-            product = request.env['product.product'].search([('name', '=', 'Units')], limit=1)
-            if product:
-                invoice_lines.append((0, 0, {
-                    'product_id': product.id,
-                    'next_reading_unit': next_reading_value,
-                }))
-
-            account_700001 = request.env['account.account'].search([('code', '=', '700001')], limit=1)
-            if account_700001:
-                invoice_lines.append((0, 0, {
-                    'account_id': account_700001.id,
-                }))
-
-            # Line 3: Account 251005
-            account_251005 = request.env['account.account'].search([('code', '=', '251005')], limit=1)
-            if account_251005:
-                invoice_lines.append((0, 0, {
-                    'account_id': account_251005.id,
-                }))
-
-            # Line 4  Account 251006
-            account_251006 = request.env['account.account'].search([('code', '=', '251006')], limit=1)
-            if account_251006:
-                invoice_lines.append((0, 0, {
-                    'account_id': account_251006.id,
-                }))
-
-            # Line 5  Account 251007
-            account_251007 = request.env['account.account'].search([('code', '=', '251007')], limit=1)
-            if account_251007:
-                invoice_lines.append((0, 0, {
-                    'account_id': account_251007.id,
-                }))
-
-            # Step 2: Create the invoice (account.move)
-            invoice_vals = {
-                'move_type': 'out_invoice',
-                'is_bill': True,
-                'partner_id': partner_id,
-                'meter_id': meter_id,
-                'reference_no': reference_no,
-                'billing_month': billing_month,
-                'reading_date': reading_date,
-                'issue_date': issue_date,
-                'electric_bill_image': image_base64,
-                'invoice_date_due': due_date,
-                'invoice_line_ids': invoice_lines,
-            }
-
-            new_invoice = request.env['account.move'].sudo().create(invoice_vals)
-
-            print(f'Invoice: {new_invoice}')
-
-            if new_invoice:
-                new_invoice.sudo().invoice_line_ids[0].write({
-                    'previous_reading_unit': new_invoice.previous_reading_unit,
-                })
-
-                # Get partner name for success popup
-                partner_name = request.env['res.partner'].sudo().browse(partner_id).name
-
-                # FIXED: Redirect with success parameters instead of passing data directly
-                return request.redirect(
-                    f'/create/electric/bill?success=true&invoice_name={new_invoice.name}&partner_name={partner_name}&meter_id={meter_id}')
+            image_attachment = request.env['ir.attachment'].sudo().create({
+                'name': image_file.filename or 'electric_bill_image',
+                'raw': image_file.read(),
+                'res_model': 'account.move',
+            }) if image_file else False
+
+            # Step 1: Resolve the product and charge accounts shared by every bill
+            bill_model = request.env['account.move'].sudo()
+            line_templates = bill_model._get_bill_line_templates()
+
+            # Step 2: Queue the invoice (account.move) creation, dates as JSON-friendly strings
+            invoice_vals = bill_model._prepare_electric_bill_vals(
+                partner_id, next_reading_value, line_templates,
+                billing_month=fields.Date.to_string(billing_month),
+                reading_date=fields.Date.to_string(reading_date),
+                issue_date=fields.Date.to_string(issue_date),
+                image_attachment_id=image_attachment.id if image_attachment else False,
+                invoice_date_due=fields.Date.to_string(due_date),
+            )
+
+            # Meter and reference number follow from the customer, only its meter names the job
+            meter_id = request.env['res.partner'].browse(partner_id).meter_id
+            job = request.env['bill.job']._enqueue(
+                f'Create bill for meter {meter_id}', 'account.move', '_job_create_electric_bill', invoice_vals)
+
+            # The page polls the job and shows the success popup once the bill exists
+            return request.redirect(f'/create/electric/bill?job_id={job.id}')
 
         # Handle GET requests, including success case from redirect
         success = request.httprequest.args.get('success') == 'true'
@@ -113,7 +66,65 @@ class CreateBillRecord(http.Controller):
                 'meter_id': meter_id,
             }
 
+        job_id = request.httprequest.args.get('job_id', '')
+
         return request.render('bill_management_system.electric_bill_creation_template_id', {
-            'res_partner_list': res_partner_list,
-            'success_data': success_data
+            'success_data': success_data,
+            'pending_job_id': int(job_id) if job_id.isdigit() else None,
         })
+
+    @http.route('/bill/job/<int:job_id>/status', type='http', auth='user', methods=['GET'])
+    def BillJobStatus(self, job_id, **kw):
+        job = request.env['bill.job'].sudo().browse(job_id).exists()
+        if not job or job.user_id != request.env.user:
+            return request.not_found()
+        return request.make_json_response(job._get_status())
+
+    @http.route('/create/electric/bill/partners', type='http', auth='user', methods=['GET'])
+    def SearchBillPartners(self, q='', limit=20, **kw):
+        """Customers whose meter ID, reference number or name starts with ``q``, for the form autocomplete."""
+        try:
+            limit = max(1, min(int(limit), PARTNER_SEARCH_LIMIT))
+        except ValueError:
+            limit = PARTNER_SEARCH_LIMIT
+        return request.make_json_response(request.env['res.partner'].sudo()._search_bill_customers(q, limit=limit))
+
+    @http.route('/api/meter/readings', type='http', auth='user', methods=['POST'], csrf=False)
+    def UploadMeterReadings(self, **kw):
+        """Bulk upload of meter readings from handheld devices.
+
+        The body is NDJSON, one reading per line, or a JSON array. The response
+        is NDJSON with one result per reading, in upload order, streamed batch by
+        batch as each one is committed. NDJSON bodies are read line by line, so
+        only one batch of readings is held in memory.
+        """
+        registry, uid, context = request.env.registry, request.env.uid, dict(request.env.context)
+        readings = self._iter_uploaded_readings(request.httprequest)
+        return request.make_response(self._iter_upload_results(registry, uid, context, readings),
+                                     headers=[('Content-Type', 'application/x-ndjson')])
+
+    def _iter_upload_results(self, registry, uid, context, readings):
+        # Runs while the response is sent, after the request's cursor is closed. Each batch
+        # is committed in a cursor of its own before its results are sent.
+        for batch in split_every(READING_UPLOAD_BATCH_SIZE, readings, list):
+            with registry.cursor() as cr:
+                results = api.Environment(cr, uid, context)['meter.reading.upload']._ingest_batch(batch)
+            yield ''.join(json.dumps(result) + '\n' for result in results).encode()
+
+    def _iter_uploaded_readings(self, httprequest):
+        if httprequest.mimetype == 'application/json':
+            try:
+                items = json.loads(httprequest.get_data())
+            except ValueError as e:
+                items = [{'__error__': f"Invalid JSON: {e}"}]
+            yield from items if isinstance(items, list) else [items]
+            return
+        stream = httprequest.stream
+        for line in iter(stream.readline, b''):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError as e:
+                yield {'__error__': f"Invalid JSON: {e}"}
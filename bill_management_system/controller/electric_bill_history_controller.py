@@ -1,11 +1,28 @@
 from odoo import http
-from odoo.http import request
+from odoo.http import Stream, request
 from datetime import datetime
+from urllib.parse import urlencode
+import json
 import logging
-import base64
+import os
 
 _logger = logging.getLogger(__name__)
 
+BILL_HISTORY_PAGE_SIZE = 24
+BILL_IMAGE_MAX_AGE = 24 * 60 * 60
+BILL_HISTORY_FIELDS = ['name', 'invoice_date', 'billing_month', 'meter_id', 'partner_id', 'amount_total',
+                       'amount_residual', 'state']
+# Groupings the portal consumption charts may ask for
+CONSUMPTION_GROUPBYS = ('billing_month:month', 'billing_month:year', 'state_id', 'city', 'meter_id')
+
+
+def bill_image_url(kind, res_id, size, unique=None):
+    """URL of a resized bill or partner image served by :meth:`ViewBillHistory.bill_image`."""
+    url = f'/bill/image/{kind}/{res_id}/{size}'
+    if unique:
+        url += '?' + urlencode({'unique': str(unique)})
+    return url
+
 
 class ViewBillHistory(http.Controller):
     @http.route('/bill/history', type='http', auth="user", website=True, csrf=False, methods=['GET', 'POST'])
@@ -39,76 +56,65 @@ class ViewBillHistory(http.Controller):
                 except ValueError:
                     _logger.warning(f"Invalid to_date format: {to_date}")
 
+            # Keyset pagination: continue after the last (billing_month, id) of the previous page
+            after_month = kw.get('after_month', '').strip()
+            after_id = kw.get('after_id', '').strip()
+            if after_id.isdigit():
+                domain += self._keyset_domain(after_month, int(after_id))
+
             # Search for bills with error handling
             try:
-                bill_recs = request.env['account.move'].with_context(active_test=False).sudo().search(
-                    domain, order='billing_month desc')
+                bill_recs = request.env['account.move'].with_context(active_test=False).sudo().search_read(
+                    domain, BILL_HISTORY_FIELDS, order='billing_month desc nulls last, id desc',
+                    limit=BILL_HISTORY_PAGE_SIZE + 1)
             except Exception as e:
                 _logger.error(f"Error searching bills: {str(e)}")
-                bill_recs = request.env['account.move']
+                bill_recs = []
+
+            has_next_page = len(bill_recs) > BILL_HISTORY_PAGE_SIZE
+            bill_recs = bill_recs[:BILL_HISTORY_PAGE_SIZE]
 
             # Process bill records
             bill_history_list = []
             for rec in bill_recs:
                 try:
-                    # Handle meter and partner image safely
-                    meter_image = None
-                    partner_image = None
-                    if rec.electric_bill_image:
-                        if isinstance(rec.electric_bill_image, bytes):
-                            # Convert base64 bytes to data URL
-                            meter_image = f"data:image/jpeg;base64,{rec.electric_bill_image.decode('utf-8')}"
-                        else:
-                            # Assume it's already base64 string
-                            meter_image = f"data:image/jpeg;base64,{rec.electric_bill_image}"
-                        meter_image = None
-
-                    if rec.partner_id.image_1920:
-                        partner_image = rec.partner_id.image_1920
-                        if partner_image and isinstance(partner_image, bytes):
-                            partner_image = partner_image.decode('utf-8')
-                        else:
-                            partner_image = None
-
-                    # Format dates safely
-                    invoice_date_str = "N/A"
-                    if rec.invoice_date:
-                        try:
-                            invoice_date_str = rec.invoice_date.strftime("%Y-%m-%d")
-                        except:
-                            invoice_date_str = str(rec.invoice_date)
-
-                    billing_month_str = "N/A"
-                    if rec.billing_month:
-                        try:
-                            billing_month_str = rec.billing_month.strftime("%Y-%m-%d")
-                        except:
-                            billing_month_str = str(rec.billing_month)
-
                     bill_history_list.append({
-                        'id': rec.id,
-                        'name': rec.name or 'N/A',
-                        'invoice_date': invoice_date_str,
-                        'billing_month': billing_month_str,
-                        'meter_id': rec.meter_id or 'N/A',
-                        'customer_name': rec.partner_id.name if rec.partner_id else 'N/A',
-                        'total_bill_amount': rec.amount_total or 0.0,
-                        'meter_image': meter_image,
-                        'partner_image': partner_image,
-                        'state': rec.state or 'draft',
-                        'paid': True if rec.amount_residual == 0.0 else False,
+                        'id': rec['id'],
+                        'name': rec['name'] or 'N/A',
+                        'invoice_date': rec['invoice_date'].strftime("%Y-%m-%d") if rec['invoice_date'] else "N/A",
+                        'billing_month': rec['billing_month'].strftime("%Y-%m-%d") if rec['billing_month'] else "N/A",
+                        'meter_id': rec['meter_id'] or 'N/A',
+                        'customer_name': rec['partner_id'][1] if rec['partner_id'] else 'N/A',
+                        'total_bill_amount': rec['amount_total'] or 0.0,
+                        'partner_image': bill_image_url('partner', rec['partner_id'][0], 128)
+                        if rec['partner_id'] else None,
+                        'state': rec['state'] or 'draft',
+                        'paid': True if rec['amount_residual'] == 0.0 else False,
                     })
 
                 except Exception as rec_error:
-                    _logger.error(f"Error processing bill record {rec.id}: {str(rec_error)}")
+                    _logger.error(f"Error processing bill record {rec['id']}: {str(rec_error)}")
                     continue
 
+            next_page_url = None
+            if has_next_page:
+                last_bill = bill_recs[-1]
+                next_page_url = '/bill/history?' + urlencode({
+                    'meter_id': meter_id,
+                    'from_date': from_date,
+                    'to_date': to_date,
+                    'after_month': last_bill['billing_month'] or '',
+                    'after_id': last_bill['id'],
+                })
+
             return request.render('bill_management_system.bill_history_template_id', {
                 'phase': 'show_filter_and_results',
                 'meter_id': meter_id,
                 'from_date': from_date,
                 'to_date': to_date,
                 'bill_history_list': bill_history_list,
+                'next_page_url': next_page_url,
+                'is_first_page': not after_id,
             })
 
         except Exception as e:
@@ -118,6 +124,23 @@ class ViewBillHistory(http.Controller):
                 'error_message': 'An error occurred while processing your request. Please try again.',
             })
 
+    @staticmethod
+    def _keyset_domain(after_month, after_id):
+        """Domain selecting the bills that sort after ``(after_month, after_id)``.
+
+        Bills are ordered by billing month (latest first, missing months last) then id.
+        """
+        if not after_month:
+            return [('billing_month', '=', False), ('id', '<', after_id)]
+        try:
+            after_month = datetime.strptime(after_month, '%Y-%m-%d').date()
+        except ValueError:
+            return [('billing_month', '=', False), ('id', '<', after_id)]
+        return ['|', '|',
+                ('billing_month', '<', after_month),
+                '&', ('billing_month', '=', after_month), ('id', '<', after_id),
+                ('billing_month', '=', False)]
+
     @http.route('/bill/details/<int:bill_id>', type='http', auth="user", website=True)
     def view_bill_details(self, bill_id, **kw):
         try:
@@ -127,19 +150,10 @@ class ViewBillHistory(http.Controller):
                     'bill': None
                 })
 
-            # Handle meter image
+            # Meter image is served by /bill/image, only check it exists (bin_size avoids loading it)
             meter_image = None
-            if bill.electric_bill_image:
-                try:
-                    if isinstance(bill.electric_bill_image, bytes):
-                        # Convert base64 bytes to data URL
-                        meter_image = f"data:image/jpeg;base64,{bill.electric_bill_image.decode('utf-8')}"
-                    else:
-                        # Assume it's already base64 string
-                        meter_image = f"data:image/jpeg;base64,{bill.electric_bill_image}"
-                except Exception as e:
-                    _logger.error(f"Error processing image for bill {bill.id}: {str(e)}")
-                    meter_image = None
+            if bill.with_context(bin_size=True).electric_bill_image:
+                meter_image = bill_image_url('bill', bill.id, 1024, bill.write_date)
 
             bill_data = {
                 'id': bill.id,
@@ -161,6 +175,27 @@ class ViewBillHistory(http.Controller):
                 'bill': None
             })
 
+    @http.route(['/bill/image/<string:kind>/<int:res_id>',
+                 '/bill/image/<string:kind>/<int:res_id>/<int:size>'], type='http', auth="user")
+    def bill_image(self, kind, res_id, size=0, **kw):
+        """Stream a (resized) meter photo or customer avatar with ETag and cache headers."""
+        if kind == 'bill':
+            record = request.env['account.move'].browse(res_id)
+            field_name = 'electric_bill_image'
+        elif kind == 'partner':
+            record = request.env['res.partner'].browse(res_id)
+            field_name = 'avatar_128' if size <= 128 else 'avatar_1920'
+        else:
+            return request.not_found()
+        # Same answer for a missing and a forbidden record, ids cannot be probed
+        if not record.exists() or not record.has_access('read'):
+            return request.not_found()
+
+        stream = request.env['ir.binary']._get_image_stream_from(
+            record, field_name, width=size, height=size,
+            placeholder='web/static/img/placeholder.png')
+        return stream.get_response(max_age=BILL_IMAGE_MAX_AGE, immutable=bool(kw.get('unique')))
+
     @http.route('/bill/pdf/<int:bill_id>', type='http', auth="user", website=True)
     def download_bill_pdf(self, bill_id, **kw):
         try:
@@ -168,43 +203,73 @@ class ViewBillHistory(http.Controller):
             if not bill.exists():
                 return request.not_found()
 
-            # STEP 1 — Find the custom bill report
-            report = request.env['ir.actions.report'].search(
-                [('report_name', '=', 'bill_management_system.report_lesco_bill_template')],
-                # <-- replace with your report's technical name
-                limit=1
-            )
-            if not report:
-                _logger.error("Bill report not found for account.move.")
-                return request.not_found()
-
-            # STEP 2 — Render PDF
-            pdf_content = report._render_qweb_pdf(report.report_name, res_ids=[bill.id])[0]
-            if not pdf_content:
-                _logger.error(f"PDF content empty for Bill {bill.id}")
-                return request.not_found()
-
-            # STEP 3 — Store PDF in ir.attachment
-            attachment = request.env['ir.attachment'].sudo().create({
-                'name': f'Bill_{bill.name or str(bill.id)}.pdf',
-                'type': 'binary',
-                'datas': base64.b64encode(pdf_content),
-                'res_model': 'account.move',
-                'res_id': bill.id,
-                'mimetype': 'application/pdf',
-            })
+            # Rendered PDFs are cached per bill and only re-rendered when the bill changes
+            attachment = bill._get_cached_bill_pdf()
+            bill._count_bill_pdf_cache_access(bool(attachment))
+            if not attachment:
+                # Render in the background and let the page poll until the PDF is ready
+                job = request.env['bill.job'].sudo().search([
+                    ('model_name', '=', 'account.move'),
+                    ('method_name', '=', '_job_render_bill_pdf'),
+                    ('args_json', '=', json.dumps([bill.id])),
+                    ('state', 'in', ('pending', 'running')),
+                    ('user_id', '=', request.env.uid),
+                ], limit=1)
+                if not job:
+                    job = request.env['bill.job']._enqueue(
+                        f'Render PDF of {bill.name or bill.id}', 'account.move', '_job_render_bill_pdf', bill.id,
+                        priority=5)
+                return request.render('bill_management_system.bill_pdf_pending_template', {
+                    'bill_id': bill.id,
+                    'bill_name': bill.name or str(bill.id),
+                    'job_id': job.id,
+                })
 
-            # STEP 4 — Return PDF as download
-            return request.make_response(pdf_content, headers=[
-                ('Content-Type', 'application/pdf'),
-                ('Content-Length', len(pdf_content)),
-                ('Content-Disposition', f'attachment; filename=Bill_{bill.name or bill.id}.pdf')
-            ])
+            # Stream the cached attachment; ETag/Last-Modified answer repeat downloads with 304
+            stream = request.env['ir.binary']._get_stream_from(attachment)
+            stream.download_name = f'Bill_{bill.name or bill.id}.pdf'
+            return stream.get_response(as_attachment=True)
 
         except Exception as e:
             _logger.error(f"Error generating bill PDF: {str(e)}")
             return request.not_found()
 
+    @http.route('/bill/print/run/<int:run_id>/download', type='http', auth="user")
+    def download_print_run(self, run_id, **kw):
+        run = request.env['bill.print.run'].browse(run_id).exists()
+        if not run or run.state != 'done' or not run.output_path or not os.path.isfile(run.output_path):
+            return request.not_found()
+
+        # Stream the file from disk, it can be far larger than memory
+        stat = os.stat(run.output_path)
+        stream = Stream(
+            type='path',
+            path=run.output_path,
+            mimetype='application/zip' if run.output_format == 'zip' else 'application/pdf',
+            download_name=os.path.basename(run.output_path),
+            size=stat.st_size,
+            last_modified=stat.st_mtime,
+        )
+        return stream.get_response(as_attachment=True)
+
+    @http.route('/bill/pdf/cache/stats', type='http', auth="user")
+    def bill_pdf_cache_stats(self, **kw):
+        if not request.env.user.has_group('base.group_system'):
+            return request.not_found()
+        return request.make_json_response(request.env['account.move']._get_bill_pdf_cache_stats())
+
+    @http.route('/bill/consumption/data', type='http', auth="user", methods=['GET'])
+    def bill_consumption_data(self, meter_id=None, state_id=None, groupby='billing_month:month', **kw):
+        if groupby not in CONSUMPTION_GROUPBYS:
+            return request.not_found()
+        domain = []
+        if meter_id:
+            domain.append(('meter_id', '=', meter_id))
+        if state_id and state_id.isdigit():
+            domain.append(('state_id', '=', int(state_id)))
+        series = request.env['meter.consumption.summary'].sudo()._get_consumption_series(domain, groupby)
+        return request.make_json_response(series)
+
 # from odoo import http
 # from odoo.http import request
 # from datetime import datetime
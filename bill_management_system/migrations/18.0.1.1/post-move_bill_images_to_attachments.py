@@ -0,0 +1,40 @@
+import logging
+
+from odoo import SUPERUSER_ID, api
+
+_logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 100
+
+
+def migrate(cr, version):
+    """Move the bill photos out of the old ``electric_bill_image`` column into attachments.
+
+    The field is stored as an attachment now, so the ORM no longer reads the
+    column. Photos are moved in batches to keep memory bounded, then the
+    column is dropped.
+    """
+    cr.execute("""
+        SELECT 1 FROM information_schema.columns
+         WHERE table_name = 'account_move' AND column_name = 'electric_bill_image'
+    """)
+    if not cr.fetchone():
+        return
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    cr.execute("SELECT id FROM account_move WHERE electric_bill_image IS NOT NULL ORDER BY id")
+    move_ids = [move_id for move_id, in cr.fetchall()]
+    for start in range(0, len(move_ids), BATCH_SIZE):
+        cr.execute("SELECT id, electric_bill_image FROM account_move WHERE id IN %s",
+                   [tuple(move_ids[start:start + BATCH_SIZE])])
+        # The column holds the base64 value, as the attachment's datas expects
+        env['ir.attachment'].create([{
+            'name': 'electric_bill_image',
+            'res_model': 'account.move',
+            'res_field': 'electric_bill_image',
+            'res_id': move_id,
+            'type': 'binary',
+            'datas': bytes(image),
+        } for move_id, image in cr.fetchall()])
+        env.invalidate_all()
+    cr.execute("ALTER TABLE account_move DROP COLUMN electric_bill_image")
+    _logger.info("Moved %d bill image(s) to attachments", len(move_ids))
@@ -0,0 +1,28 @@
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    """Make meter ids unique before the ``meter_id_uniq`` constraint is added.
+
+    The oldest customer keeps a duplicated meter id, the others get their id
+    suffixed with ``-DUP-<partner id>`` and are listed in the log so they can
+    be corrected by hand.
+    """
+    cr.execute("""
+        WITH duplicates AS (
+            SELECT id, meter_id,
+                   ROW_NUMBER() OVER (PARTITION BY meter_id ORDER BY id) AS rank
+              FROM res_partner
+             WHERE meter_id IS NOT NULL
+        )
+        UPDATE res_partner partner
+           SET meter_id = duplicates.meter_id || '-DUP-' || partner.id
+          FROM duplicates
+         WHERE partner.id = duplicates.id
+           AND duplicates.rank > 1
+     RETURNING partner.id, duplicates.meter_id
+    """)
+    for partner_id, meter_id in cr.fetchall():
+        _logger.warning("Meter ID %r was shared, renamed it on customer %s", meter_id, partner_id)
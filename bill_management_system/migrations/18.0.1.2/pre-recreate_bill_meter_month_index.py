@@ -0,0 +1,7 @@
+def migrate(cr, version):
+    """Drop the bill history index so ``init`` recreates it with missing months last.
+
+    The history is ordered ``billing_month DESC NULLS LAST``, which the former
+    ``billing_month DESC`` (nulls first) index could not serve in order.
+    """
+    cr.execute("DROP INDEX IF EXISTS account_move_bill_meter_month_index")
@@ -1,2 +1,8 @@
 from . import invoice_inherit
 from . import res_partner_inherit
+from . import meter_reading
+from . import bill_print_run
+from . import bill_job
+from . import meter_consumption_summary
+from . import meter_reading_upload
+from . import bill_tariff
@@ -0,0 +1,149 @@
+import json
+import logging
+import time
+from datetime import timedelta
+
+from odoo import api, fields, models
+
+_logger = logging.getLogger(__name__)
+
+# Seconds a single cron run keeps draining the queue before yielding
+JOB_CRON_TIME_BUDGET = 50
+# Jobs left "running" longer than this were interrupted by a dead worker
+JOB_STALE_AFTER = timedelta(minutes=15)
+
+
+class BillJob(models.Model):
+    _name = 'bill.job'
+    _description = 'Bill Background Job'
+    _order = 'id desc'
+
+    name = fields.Char(string='Description', required=True)
+    model_name = fields.Char(string='Model', required=True)
+    method_name = fields.Char(string='Method', required=True)
+    args_json = fields.Text(string='Arguments', default='[]')
+    user_id = fields.Many2one('res.users', string='Requested By', default=lambda self: self.env.user,
+                              required=True)
+    priority = fields.Integer(string='Priority', default=10, help="Lower runs first.")
+    state = fields.Selection([
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ], string='Status', default='pending', required=True, index=True)
+    eta = fields.Datetime(string='Run After', help="Not run before this time, used to back off retries.")
+    attempts = fields.Integer(string='Attempts', default=0)
+    max_attempts = fields.Integer(string='Max Attempts', default=3)
+    date_started = fields.Datetime(string='Started')
+    date_done = fields.Datetime(string='Finished')
+    result_json = fields.Text(string='Result')
+    error = fields.Text(string='Error')
+
+    @api.model
+    def _enqueue(self, name, model_name, method_name, *args, priority=10, max_attempts=3):
+        """Queue ``env[model_name].method_name(*args)`` and wake up the job runner.
+
+        Arguments must be JSON serializable; the method's return value is stored
+        as the job result.
+        """
+        job = self.sudo().create({
+            'name': name,
+            'model_name': model_name,
+            'method_name': method_name,
+            'args_json': json.dumps(list(args)),
+            'user_id': self.env.uid,
+            'priority': priority,
+            'max_attempts': max_attempts,
+        })
+        self.env.ref('bill_management_system.ir_cron_run_bill_jobs').sudo()._trigger()
+        return job
+
+    def _get_status(self):
+        self.ensure_one()
+        return {
+            'id': self.id,
+            'state': self.state,
+            'attempts': self.attempts,
+            'result': json.loads(self.result_json) if self.result_json else None,
+            'error': self.error if self.state == 'failed' else None,
+        }
+
+    def action_retry(self):
+        self.filtered(lambda job: job.state == 'failed').write({
+            'state': 'pending', 'attempts': 0, 'eta': False, 'error': False,
+        })
+        self.env.ref('bill_management_system.ir_cron_run_bill_jobs').sudo()._trigger()
+
+    @api.model
+    def _cron_run_jobs(self):
+        self._requeue_stale_jobs()
+        deadline = time.monotonic() + JOB_CRON_TIME_BUDGET
+        while time.monotonic() < deadline:
+            job = self._claim_next_job()
+            if not job:
+                break
+            job._run()
+
+    @api.model
+    def _requeue_stale_jobs(self):
+        stale = self.search([('state', '=', 'running'),
+                             ('date_started', '<', fields.Datetime.now() - JOB_STALE_AFTER)])
+        if not stale:
+            return
+        # A job killed on every attempt (time limit, out of memory) must not be retried forever
+        exhausted = stale.filtered(lambda job: job.attempts >= job.max_attempts)
+        if exhausted:
+            _logger.warning("Bill jobs: %d interrupted jobs out of attempts, marking them failed", len(exhausted))
+            exhausted.write({
+                'state': 'failed',
+                'date_done': fields.Datetime.now(),
+                'error': "The job was interrupted on every attempt.",
+            })
+        if stale - exhausted:
+            _logger.warning("Bill jobs: requeueing %d interrupted jobs", len(stale - exhausted))
+            (stale - exhausted).write({'state': 'pending'})
+        self.env.cr.commit()
+
+    @api.model
+    def _claim_next_job(self):
+        """Lock and mark the next due job as running; SKIP LOCKED lets several runners share the queue."""
+        self.env.cr.execute("""
+            SELECT id FROM bill_job
+             WHERE state = 'pending'
+               AND (eta IS NULL OR eta <= NOW() AT TIME ZONE 'UTC')
+          ORDER BY priority, id
+             LIMIT 1
+               FOR UPDATE SKIP LOCKED
+        """)
+        row = self.env.cr.fetchone()
+        if not row:
+            return self.browse()
+        job = self.browse(row[0])
+        job.write({'state': 'running', 'date_started': fields.Datetime.now(), 'attempts': job.attempts + 1})
+        self.env.cr.commit()
+        return job
+
+    def _run(self):
+        self.ensure_one()
+        try:
+            with self.env.cr.savepoint():
+                records = self.env[self.model_name].with_user(self.user_id)
+                result = getattr(records, self.method_name)(*json.loads(self.args_json or '[]'))
+            self.write({
+                'state': 'done',
+                'date_done': fields.Datetime.now(),
+                'result_json': json.dumps(result, default=str),
+                'error': False,
+            })
+        except Exception as e:
+            _logger.exception("Bill job %s (%s) failed", self.id, self.name)
+            if self.attempts < self.max_attempts:
+                # Back off 1, 4, 9... minutes between attempts
+                self.write({
+                    'state': 'pending',
+                    'eta': fields.Datetime.now() + timedelta(minutes=self.attempts ** 2),
+                    'error': str(e),
+                })
+            else:
+                self.write({'state': 'failed', 'date_done': fields.Datetime.now(), 'error': str(e)})
+        self.env.cr.commit()
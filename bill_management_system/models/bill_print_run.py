@@ -0,0 +1,244 @@
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from odoo import api, fields, models
+from odoo.exceptions import UserError
+from odoo.tools import config, date_utils
+from odoo.tools.pdf import PdfFileReader, PdfFileWriter
+
+from .invoice_inherit import BILL_REPORT_NAME
+
+_logger = logging.getLogger(__name__)
+
+# The merged PDF is assembled in memory, larger runs must use the ZIP output
+MERGED_PDF_MAX_BILLS = 2000
+
+
+class BillPrintRun(models.Model):
+    _name = 'bill.print.run'
+    _description = 'Bill Print Run'
+    _order = 'id desc'
+
+    name = fields.Char(string='Name', compute='_compute_name', store=True)
+    billing_month = fields.Date(string='Billing Month', required=True)
+    partner_ids = fields.Many2many('res.partner', string='Customers',
+                                   help="Only print the bills of these customers. Leave empty for all.")
+    meter_id = fields.Char(string='Meter ID', help="Only print the bills of this meter.")
+    output_format = fields.Selection([
+        ('pdf', 'Merged PDF'),
+        ('zip', 'ZIP of PDF chunks'),
+    ], string='Output', default='zip', required=True)
+    chunk_size = fields.Integer(string='Bills per Chunk', default=200,
+                                help="Bills rendered together in a single wkhtmltopdf run.")
+    worker_count = fields.Integer(string='Workers', default=4,
+                                  help="Number of chunks rendered in parallel.")
+
+    state = fields.Selection([
+        ('draft', 'Draft'),
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ], string='Status', default='draft', required=True, readonly=True, copy=False)
+    bill_ids_json = fields.Text(string='Bills', readonly=True, copy=False,
+                                help="Bill ids frozen when the run starts, so a resumed run prints the same set.")
+    bill_count = fields.Integer(string='Bills', readonly=True, copy=False)
+    chunk_count = fields.Integer(string='Chunks', readonly=True, copy=False)
+    chunks_done = fields.Integer(string='Chunks Done', readonly=True, copy=False)
+    progress = fields.Float(string='Progress', compute='_compute_progress')
+    output_path = fields.Char(string='Output File', readonly=True, copy=False)
+    duration = fields.Float(string='Render Time (s)', readonly=True, copy=False)
+    error_message = fields.Text(string='Error', readonly=True, copy=False)
+
+    @api.depends('billing_month')
+    def _compute_name(self):
+        for run in self:
+            run.name = f"Print Run {run.billing_month.strftime('%Y-%m')}" if run.billing_month else "Print Run"
+
+    @api.depends('chunks_done', 'chunk_count')
+    def _compute_progress(self):
+        for run in self:
+            run.progress = 100.0 * run.chunks_done / run.chunk_count if run.chunk_count else 0.0
+
+    @api.constrains('chunk_size', 'worker_count')
+    def _check_sizes(self):
+        for run in self:
+            if run.chunk_size <= 0 or run.worker_count <= 0:
+                raise UserError("Chunk size and worker count must be greater than zero.")
+
+    def action_start(self):
+        for run in self:
+            if run.state not in ('draft', 'failed'):
+                continue
+            if not run.bill_ids_json:
+                bill_ids = self.env['account.move'].search(run._get_bill_domain(), order='id').ids
+                if not bill_ids:
+                    raise UserError("No bills found for this billing month.")
+                run.write({
+                    'bill_ids_json': json.dumps(bill_ids),
+                    'bill_count': len(bill_ids),
+                    'chunk_count': -(-len(bill_ids) // run.chunk_size),
+                })
+            if run.output_format == 'pdf' and run.bill_count > MERGED_PDF_MAX_BILLS:
+                raise UserError(f"{run.name} has {run.bill_count} bills, a merged PDF is limited to "
+                                f"{MERGED_PDF_MAX_BILLS}. Use the ZIP output instead.")
+            run.write({'state': 'queued', 'error_message': False})
+        self.env.ref('bill_management_system.ir_cron_process_bill_print_runs').sudo()._trigger()
+
+    def action_reset_to_draft(self):
+        # Chunks of the previous bill set must not be picked up as already rendered
+        for run in self:
+            shutil.rmtree(run._get_work_dir(create=False), ignore_errors=True)
+        self.write({'state': 'draft', 'bill_ids_json': False, 'bill_count': 0, 'chunk_count': 0,
+                    'chunks_done': 0, 'output_path': False, 'error_message': False})
+
+    def action_download(self):
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_url',
+            'url': f'/bill/print/run/{self.id}/download',
+            'target': 'self',
+        }
+
+    def _get_bill_domain(self):
+        self.ensure_one()
+        domain = [
+            ('is_bill', '=', True),
+            ('state', '!=', 'cancel'),
+            ('billing_month', '>=', date_utils.start_of(self.billing_month, 'month')),
+            ('billing_month', '<=', date_utils.end_of(self.billing_month, 'month')),
+        ]
+        if self.partner_ids:
+            domain.append(('partner_id', 'in', self.partner_ids.ids))
+        if self.meter_id:
+            domain.append(('meter_id', '=', self.meter_id))
+        return domain
+
+    def _get_work_dir(self, create=True):
+        self.ensure_one()
+        path = os.path.join(config['data_dir'], 'bill_print_runs', self.env.cr.dbname, str(self.id))
+        if create:
+            os.makedirs(path, exist_ok=True)
+        return path
+
+    def _get_chunks(self):
+        self.ensure_one()
+        bill_ids = json.loads(self.bill_ids_json or '[]')
+        return [bill_ids[start:start + self.chunk_size] for start in range(0, len(bill_ids), self.chunk_size)]
+
+    @api.model
+    def _cron_process_print_runs(self):
+        # Runs left in "running" by a crashed worker are picked up again and resumed
+        run = self.search([('state', 'in', ('queued', 'running'))], order='id', limit=1)
+        if run:
+            run._process()
+
+    def _process(self):
+        self.ensure_one()
+        self.state = 'running'
+        self.env.cr.commit()
+        try:
+            self._render()
+        except Exception as e:
+            # Leaving the run "running" would make the cron pick it again before any other run
+            _logger.exception("Bill print run %s failed", self.id)
+            self.env.cr.rollback()
+            self.write({'state': 'failed', 'error_message': str(e)})
+        self.env.cr.commit()
+
+    def _render(self):
+        self.ensure_one()
+        started = time.perf_counter()
+        work_dir = self._get_work_dir()
+        chunks = self._get_chunks()
+        pending = [
+            (index, chunk) for index, chunk in enumerate(chunks)
+            if not os.path.exists(self._chunk_path(work_dir, index))
+        ]
+        self.chunks_done = len(chunks) - len(pending)
+        self.env.cr.commit()
+        _logger.info("Bill print run %s: %d/%d chunks left", self.id, len(pending), len(chunks))
+
+        errors = []
+        dbname, uid, context = self.env.cr.dbname, self.env.uid, dict(self.env.context)
+        # Threads rather than processes: the time goes into the wkhtmltopdf subprocess each
+        # chunk starts, which runs outside the GIL. Forking the cron worker would copy its
+        # open database connections, and one cron job per chunk would wait on the cron
+        # workers left by the other jobs. Each thread still renders on its own cursor.
+        with ThreadPoolExecutor(max_workers=self.worker_count) as executor:
+            futures = {
+                executor.submit(self._render_chunk, dbname, uid, context, chunk, self._chunk_path(work_dir, index)):
+                    index
+                for index, chunk in pending
+            }
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    _logger.exception("Bill print run %s: chunk %d failed", self.id, futures[future])
+                    errors.append(f"Chunk {futures[future] + 1}: {e}")
+                    continue
+                # Commit progress per chunk so it is visible and survives a crash
+                self.chunks_done += 1
+                self.env.cr.commit()
+
+        if errors:
+            self.write({'state': 'failed', 'error_message': '\n'.join(errors)})
+            return
+
+        self.write({
+            'state': 'done',
+            'output_path': self._write_output(work_dir, len(chunks)),
+            'duration': self.duration + time.perf_counter() - started,
+        })
+        _logger.info("Bill print run %s: %d bills printed in %.1fs", self.id, self.bill_count, self.duration)
+
+    @api.model
+    def _render_chunk(self, dbname, uid, context, bill_ids, path):
+        """Render one chunk of bills in its own cursor, so chunks can run in parallel threads."""
+        threading.current_thread().dbname = dbname
+        threading.current_thread().uid = uid
+        with self.pool.cursor() as cr:
+            env = api.Environment(cr, uid, context)
+            pdf_content = env['ir.actions.report']._render_qweb_pdf(BILL_REPORT_NAME, res_ids=bill_ids)[0]
+        # Write then rename, so a crash never leaves a half-written chunk behind
+        with open(path + '.tmp', 'wb') as chunk_file:
+            chunk_file.write(pdf_content)
+        os.replace(path + '.tmp', path)
+
+    @staticmethod
+    def _chunk_path(work_dir, index):
+        return os.path.join(work_dir, f'chunk_{index + 1:05d}.pdf')
+
+    def _write_output(self, work_dir, chunk_count):
+        """Assemble the rendered chunks into the final file, one chunk at a time."""
+        self.ensure_one()
+        base_name = f"bills_{self.billing_month.strftime('%Y_%m')}_{self.id}"
+        chunk_paths = [self._chunk_path(work_dir, index) for index in range(chunk_count)]
+        if self.output_format == 'zip':
+            output_path = os.path.join(work_dir, base_name + '.zip')
+            with zipfile.ZipFile(output_path + '.tmp', 'w', zipfile.ZIP_DEFLATED) as archive:
+                for path in chunk_paths:
+                    archive.write(path, os.path.basename(path))
+        else:
+            output_path = os.path.join(work_dir, base_name + '.pdf')
+            writer = PdfFileWriter()
+            chunk_files = [open(path, 'rb') for path in chunk_paths]
+            try:
+                for chunk_file in chunk_files:
+                    reader = PdfFileReader(chunk_file, strict=False)
+                    for page in range(reader.getNumPages()):
+                        writer.addPage(reader.getPage(page))
+                with open(output_path + '.tmp', 'wb') as output_file:
+                    writer.write(output_file)
+            finally:
+                for chunk_file in chunk_files:
+                    chunk_file.close()
+        os.replace(output_path + '.tmp', output_path)
+        return output_path
@@ -0,0 +1,209 @@
+import logging
+import time
+from collections import defaultdict
+
+from odoo import api, fields, models
+from odoo.exceptions import ValidationError
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+_logger = logging.getLogger(__name__)
+
+FIXED_CHARGE_LINE_NAME = 'Fixed Charge'
+FIXED_CHARGE_LINE_SEQUENCE = 1000
+
+
+class BillTariff(models.Model):
+    _name = 'bill.tariff'
+    _description = 'Electricity Tariff'
+    _order = 'sequence, id'
+
+    name = fields.Char(string='Tariff', required=True)
+    active = fields.Boolean(default=True)
+    sequence = fields.Integer(default=10, help="Customers without a tariff of their own are billed on the first one.")
+    fixed_charge = fields.Float(string='Fixed Charge', digits=(16, 2),
+                                help="Charged once per bill on a line of its own, also when nothing was consumed.")
+    apply_mf = fields.Boolean(string='Apply MF', default=True,
+                              help="Multiply the metered units by the bill's MF before pricing them.")
+    slab_ids = fields.One2many('bill.tariff.slab', 'tariff_id', string='Slabs', copy=True)
+
+    def _get_slab_bounds(self):
+        """Return ``(lower, upper, rate)`` tuples of the slabs, the last upper bound being infinite if open."""
+        self.ensure_one()
+        return [
+            (slab.units_from, slab.units_to or float('inf'), slab.rate)
+            for slab in self.slab_ids.sorted('units_from')
+        ]
+
+    def _compute_unit_charges(self, units):
+        """Return the slab charges of every value of ``units``, in order.
+
+        Each unit is charged at the rate of the slab it falls into, so a bill of
+        250 units on 0-100 / 100-200 / 200+ slabs pays 100 units at the first
+        rate, 100 at the second and 50 at the third.
+        """
+        self.ensure_one()
+        bounds = self._get_slab_bounds()
+        if not bounds:
+            return [0.0] * len(units)
+        if np is not None:
+            lower, upper, rates = (np.array(column, dtype=float) for column in zip(*bounds))
+            # One row per bill, one column per slab: the units falling into that slab
+            units_in_slab = np.clip(np.asarray(units, dtype=float)[:, None] - lower, 0.0, upper - lower)
+            return (units_in_slab @ rates).tolist()
+        return [
+            sum(min(max(value - lower, 0.0), upper - lower) * rate for lower, upper, rate in bounds)
+            for value in units
+        ]
+
+    @api.model
+    def _get_default_tariff(self):
+        return self.search([], limit=1)
+
+    @api.model
+    def _price_bills(self, bills):
+        """Price the draft ``bills`` from their tariff.
+
+        The "Units" line gets the slab charges of the billed units (metered
+        units times MF) divided by the metered units. The fixed charge is billed
+        on a line of its own, so it is also due when nothing was consumed.
+        Bills are priced per tariff as one vector and lines sharing a price are
+        written together.
+        """
+        bills = bills.filtered(lambda move: move.is_bill and move.state == 'draft' and move.tariff_id)
+        if not bills:
+            return
+        started = time.perf_counter()
+        self.env['account.move'].flush_model(['tariff_id', 'mf_value', 'state'])
+        self.env['account.move.line'].flush_model(['quantity', 'display_type', 'move_id', 'is_tariff_fixed_charge'])
+        self.env.cr.execute("""
+            SELECT DISTINCT ON (move.id) move.tariff_id, move.id, line.id, line.quantity, line.account_id,
+                   COALESCE(NULLIF(move.mf_value, 0), 1)
+              FROM account_move move
+              JOIN account_move_line line ON line.move_id = move.id AND line.display_type = 'product'
+                                         AND line.is_tariff_fixed_charge IS NOT TRUE
+             WHERE move.id IN %s
+          ORDER BY move.id, line.sequence, line.id
+        """, [tuple(bills.ids)])
+        rows_by_tariff = defaultdict(list)
+        for tariff_id, *row in self.env.cr.fetchall():
+            rows_by_tariff[tariff_id].append(row)
+
+        digits = self.env['decimal.precision'].precision_get('Product Price')
+        currency = self.env.company.currency_id
+        line_ids_by_price = defaultdict(list)
+        move_ids, billed_units, charges, fixed_charges = [], [], [], []
+        fixed_line_vals = {}
+        for tariff in self.browse(list(rows_by_tariff)):
+            rows = rows_by_tariff[tariff.id]
+            quantities = [quantity or 0.0 for _move_id, _line_id, quantity, _account_id, _mf in rows]
+            units = [quantity * mf if tariff.apply_mf else quantity
+                     for quantity, (_move_id, _line_id, _quantity, _account_id, mf) in zip(quantities, rows)]
+            for (move_id, line_id, _q, account_id, _mf), quantity, value, charge in zip(
+                    rows, quantities, units, tariff._compute_unit_charges(units)):
+                price_unit = round(charge / quantity, digits) if quantity > 0 else 0.0
+                line_ids_by_price[price_unit].append(line_id)
+                move_ids.append(move_id)
+                billed_units.append(value)
+                # What the line actually bills once its price is rounded, so the lines add up to the bill's charges
+                charges.append(currency.round(quantity * price_unit))
+                fixed_charges.append(tariff.fixed_charge)
+                fixed_line_vals[move_id] = {'account_id': account_id, 'price_unit': tariff.fixed_charge}
+
+        lines = self.env['account.move.line']
+        for price_unit, line_ids in line_ids_by_price.items():
+            lines.browse(line_ids).write({'price_unit': price_unit})
+        self._set_fixed_charge_lines(fixed_line_vals)
+        self.env.cr.execute("""
+            UPDATE account_move move
+               SET billed_units = priced.billed_units, tariff_charge = priced.charge,
+                   tariff_fixed_charge = priced.fixed_charge
+              FROM unnest(%s::int[], %s::float[], %s::float[], %s::float[])
+                   AS priced(move_id, billed_units, charge, fixed_charge)
+             WHERE move.id = priced.move_id
+        """, [move_ids, billed_units, charges, fixed_charges])
+        bills.invalidate_recordset(['billed_units', 'tariff_charge', 'tariff_fixed_charge'])
+        _logger.info("Tariff pricing: %d bill(s), %d price group(s) in %.2fs",
+                     len(move_ids), len(line_ids_by_price), time.perf_counter() - started)
+
+    @api.model
+    def _set_fixed_charge_lines(self, vals_by_move):
+        """Create, update or remove the fixed charge line of each bill.
+
+        ``vals_by_move`` maps bill ids to ``{'account_id', 'price_unit'}``; bills
+        whose tariff has no fixed charge lose their line.
+        """
+        line_model = self.env['account.move.line']
+        existing = line_model.search([
+            ('move_id', 'in', list(vals_by_move)),
+            ('is_tariff_fixed_charge', '=', True),
+        ])
+        line_by_move = {line.move_id.id: line for line in existing}
+        to_unlink = line_model
+        line_ids_by_price = defaultdict(list)
+        to_create = []
+        for move_id, vals in vals_by_move.items():
+            line = line_by_move.get(move_id)
+            if not vals['price_unit']:
+                if line:
+                    to_unlink |= line
+            elif line:
+                if line.price_unit != vals['price_unit']:
+                    line_ids_by_price[vals['price_unit']].append(line.id)
+            else:
+                to_create.append({
+                    'move_id': move_id,
+                    'display_type': 'product',
+                    'name': FIXED_CHARGE_LINE_NAME,
+                    'account_id': vals['account_id'],
+                    'quantity': 1.0,
+                    'price_unit': vals['price_unit'],
+                    # After the lines the bill layout reads by position
+                    'sequence': FIXED_CHARGE_LINE_SEQUENCE,
+                    'is_tariff_fixed_charge': True,
+                })
+        for price_unit, line_ids in line_ids_by_price.items():
+            line_model.browse(line_ids).write({'price_unit': price_unit})
+        if to_create:
+            line_model.create(to_create)
+        to_unlink.unlink()
+
+    def action_reprice_draft_bills(self):
+        self.env['bill.job']._enqueue(f"Reprice draft bills of {', '.join(self.mapped('name'))}",
+                                      'bill.tariff', '_job_reprice_bills', self.ids)
+
+    @api.model
+    def _job_reprice_bills(self, tariff_ids):
+        bills = self.env['account.move'].sudo().search([
+            ('tariff_id', 'in', tariff_ids),
+            ('is_bill', '=', True),
+            ('state', '=', 'draft'),
+        ])
+        self.sudo()._price_bills(bills)
+        return {'priced': len(bills)}
+
+
+class BillTariffSlab(models.Model):
+    _name = 'bill.tariff.slab'
+    _description = 'Electricity Tariff Slab'
+    _order = 'tariff_id, units_from'
+
+    tariff_id = fields.Many2one('bill.tariff', string='Tariff', required=True, ondelete='cascade', index=True)
+    units_from = fields.Float(string='From Units', digits=(16, 2), required=True)
+    units_to = fields.Float(string='To Units', digits=(16, 2), help="Leave empty for the last, open ended slab.")
+    rate = fields.Float(string='Rate per Unit', digits='Product Price', required=True)
+
+    @api.constrains('units_from', 'units_to')
+    def _check_bounds(self):
+        for slab in self:
+            if slab.units_from < 0 or (slab.units_to and slab.units_to <= slab.units_from):
+                raise ValidationError(f"Slab {slab.units_from} - {slab.units_to} of {slab.tariff_id.name} "
+                                      f"must end after it starts.")
+        for tariff in self.tariff_id:
+            bounds = tariff._get_slab_bounds()
+            for (_lower, upper, _rate), (next_lower, _upper, _next_rate) in zip(bounds, bounds[1:]):
+                if next_lower < upper:
+                    raise ValidationError(f"Slabs of {tariff.name} overlap.")
@@ -1,12 +1,39 @@
+import base64
+import hashlib
+import logging
+import time
+
 from odoo import api, fields, models
+from odoo.tools.sql import create_index
+
+_logger = logging.getLogger(__name__)
+
+BILL_REPORT_NAME = 'bill_management_system.report_lesco_bill_template'
+
+# Database sequences counting the rendered bill PDF cache hits and misses of all workers
+BILL_PDF_CACHE_SEQUENCES = {
+    'hits': 'bill_management_system_pdf_cache_hits',
+    'misses': 'bill_management_system_pdf_cache_misses',
+}
+
+# Product carrying the meter reading and the charge accounts every electric
+# bill is made of, in the order their lines appear on the bill.
+BILL_PRODUCT_NAME = 'Units'
+BILL_ACCOUNT_CODES = ('700001', '251005', '251006', '251007')
+
+# Late payment surcharge rule: a percentage of the outstanding amount plus a fixed charge
+SURCHARGE_RATE_PARAM = 'bill_management_system.late_payment_surcharge_rate'
+SURCHARGE_FIXED_PARAM = 'bill_management_system.late_payment_surcharge_fixed'
+DEFAULT_SURCHARGE_RATE = 10.0
 
 
 class AccountMoveInherit(models.Model):
     _inherit = 'account.move'
 
-    meter_id = fields.Char(string='Meter ID', related='partner_id.meter_id', readonly=True)
+    meter_id = fields.Char(string='Meter ID', related='partner_id.meter_id', readonly=True, store=True,
+                           index=True)
     reference_no = fields.Char(string='Reference Number', related='partner_id.reference_no',
-                               readonly=True)
+                               readonly=True, store=True, index=True)
     is_bill = fields.Boolean('Is Bill')
     billing_month = fields.Date(string='Billing Month')
     reading_date = fields.Date(string='Reading Date')
@@ -15,40 +42,293 @@ class AccountMoveInherit(models.Model):
     previous_reading_unit = fields.Float(string='Previous Reading (Auto)', compute='_compute_previous_reading_unit',
                                          store=True)
 
-    electric_bill_image = fields.Binary(string='Electric Bill Image')
+    electric_bill_image = fields.Binary(string='Electric Bill Image', attachment=True)
     complaint_mobile_number = fields.Char(string='Mobile(Complaint)', default='03014630923')
     complaint_ptcl_number = fields.Char(string='PTCL No', default='04235759157(EXT 114)')
 
+    tariff_id = fields.Many2one('bill.tariff', string='Tariff', compute='_compute_tariff_id', store=True,
+                                readonly=False, precompute=True)
+    billed_units = fields.Float(string='Billed Units', digits=(16, 2), readonly=True, copy=False,
+                                help="Metered units times MF, as priced by the tariff.")
+    tariff_charge = fields.Float(string='Tariff Charge', digits=(16, 2), readonly=True, copy=False,
+                                 help="Slab charges billed on the Units line.")
+    tariff_fixed_charge = fields.Float(string='Fixed Charge', digits=(16, 2), readonly=True, copy=False,
+                                       help="Fixed charge of the tariff, billed on its own line.")
+
     late_payment_surcharge = fields.Float(string='Late Payment Surcharge')
+    late_payment_surcharge_date = fields.Date(string='Surcharge Applied On', copy=False, readonly=True,
+                                              help="Set by the late payment surcharge cron. A bill is only "
+                                                   "surcharged once for its billing cycle.")
 
     bill_notes = fields.Text(string='Bill Notes')
     signatory_name_1 = fields.Char(string='Signatory Name 1')
     signatory_name_2 = fields.Char(string='Signatory Name 2')
     signatory_name_3 = fields.Char(string='Signatory Name 3')
 
-    @api.depends('partner_id', 'is_bill', 'date')
-    def _compute_previous_reading_unit(self):
+    bill_pdf_attachment_id = fields.Many2one('ir.attachment', string='Cached Bill PDF', copy=False,
+                                             readonly=True, ondelete='set null')
+    bill_pdf_cache_key = fields.Char(string='Bill PDF Cache Key', copy=False, readonly=True)
+
+    def init(self):
+        super().init()
+        # Bill history pages are keyset-paginated per meter on (billing_month, id)
+        create_index(self.env.cr, 'account_move_bill_meter_month_index', self._table,
+                     ['meter_id', 'billing_month DESC NULLS LAST', 'id DESC'], where='is_bill IS TRUE')
+        # The surcharge cron only ever looks at posted bills not surcharged yet
+        create_index(self.env.cr, 'account_move_bill_surcharge_due_index', self._table,
+                     ['invoice_date_due'],
+                     where="is_bill IS TRUE AND state = 'posted' AND late_payment_surcharge_date IS NULL")
+        # Bill PDF cache counters, shared by all workers
+        for sequence in BILL_PDF_CACHE_SEQUENCES.values():
+            self.env.cr.execute(f"CREATE SEQUENCE IF NOT EXISTS {sequence}")
+
+    @api.depends('partner_id', 'is_bill')
+    def _compute_tariff_id(self):
+        default_tariff = self.env['bill.tariff']._get_default_tariff()
         for move in self:
-            if move.is_bill and move.partner_id:
-                # Search for the most recent posted bill for the same partner
-                last_bill = self.env['account.move'].search([
-                    ('partner_id', '=', move.partner_id.id),
-                    ('is_bill', '=', True),
-                    ('state', '=', 'posted'),
-                    ('billing_month', '<', move.billing_month or fields.Date.today()),
-                    ('id', '!=', move.id),
-                ], order='billing_month desc', limit=1)
-
-                print(f'Last billing month: {last_bill}')
-
-                if last_bill and last_bill.invoice_line_ids:
-                    # Get the next_reading_unit from the last bill's line (assuming one line per bill)
-                    move.previous_reading_unit = last_bill.invoice_line_ids[0].next_reading_unit
-                else:
-                    move.previous_reading_unit = 0.0
+            if move.is_bill:
+                move.tariff_id = move.partner_id.bill_tariff_id or move.tariff_id or default_tariff
             else:
-                move.previous_reading_unit = 0.0
-                move.partner_id.partner_previous_reading = 0.0
+                move.tariff_id = False
+
+    @api.depends('partner_id', 'is_bill', 'billing_month')
+    def _compute_previous_reading_unit(self):
+        bills = self.filtered(lambda move: move.is_bill and move.partner_id)
+        readings = self.env['meter.reading']._get_previous_readings(bills)
+        for move in bills:
+            move.previous_reading_unit = readings.get(move.id, 0.0)
+        (self - bills).previous_reading_unit = 0.0
+
+    def _post(self, soft=True):
+        # Readings may have been corrected since the bill was created
+        self.env['bill.tariff']._price_bills(self)
+        posted = super()._post(soft=soft)
+        bills = posted.filtered('is_bill')
+        self.env['meter.reading']._record_bill_readings(bills)
+        self.env['meter.consumption.summary']._refresh_for_bills(bills)
+        return posted
+
+    def button_draft(self):
+        res = super().button_draft()
+        self.env['meter.reading'].search([('move_id', 'in', self.ids)]).unlink()
+        self.env['meter.consumption.summary']._refresh_for_bills(self)
+        return res
+
+    def button_cancel(self):
+        res = super().button_cancel()
+        self.env['meter.consumption.summary']._refresh_for_bills(self)
+        return res
+
+    @api.model
+    def _cron_apply_late_payment_surcharge(self):
+        """Surcharge every overdue, unpaid bill in a single UPDATE.
+
+        The surcharge is ``rate`` percent of the outstanding amount plus a fixed
+        charge, both read from system parameters. Bills keep the date the
+        surcharge was applied, so running the cron again in the same billing
+        cycle leaves them untouched. Surcharges entered by hand are kept.
+        """
+        started = time.perf_counter()
+        params = self.env['ir.config_parameter'].sudo()
+        rate = float(params.get_param(SURCHARGE_RATE_PARAM, DEFAULT_SURCHARGE_RATE))
+        fixed = float(params.get_param(SURCHARGE_FIXED_PARAM, 0.0))
+        today = fields.Date.context_today(self)
+
+        self.flush_model(['is_bill', 'state', 'invoice_date_due', 'amount_residual',
+                          'late_payment_surcharge', 'late_payment_surcharge_date'])
+        # write_date is bumped on purpose: it invalidates the cached bill PDFs
+        self.env.cr.execute("""
+            UPDATE account_move
+               SET late_payment_surcharge = ROUND((amount_residual * %(rate)s / 100.0 + %(fixed)s)::numeric, 2),
+                   late_payment_surcharge_date = %(today)s,
+                   write_uid = %(uid)s,
+                   write_date = NOW() AT TIME ZONE 'UTC'
+             WHERE is_bill IS TRUE
+               AND state = 'posted'
+               AND late_payment_surcharge_date IS NULL
+               AND invoice_date_due < %(today)s
+               AND amount_residual > 0
+               AND COALESCE(late_payment_surcharge, 0) = 0
+         RETURNING id
+        """, {'rate': rate, 'fixed': fixed, 'today': today, 'uid': self.env.uid})
+        surcharged_ids = [row[0] for row in self.env.cr.fetchall()]
+        self.invalidate_model(['late_payment_surcharge', 'late_payment_surcharge_date', 'write_uid',
+                               'write_date'])
+        _logger.info("Late payment surcharge (%.2f%% + %.2f) applied to %d bill(s) in %.2fs",
+                     rate, fixed, len(surcharged_ids), time.perf_counter() - started)
+        return surcharged_ids
+
+    def _get_bill_pdf_cache_key(self, report):
+        """Hash of everything the bill PDF is rendered from.
+
+        The key only changes when the bill, its lines, its customer or the report
+        template are written, so an unchanged bill keeps hitting the same cache entry.
+        """
+        self.ensure_one()
+        view = self.env['ir.ui.view'].sudo().search([('key', '=', report.report_name)], limit=1)
+        inputs = [
+            report.id, report.write_date, view.write_date,
+            self.id, self.write_date,
+            self.partner_id.id, self.partner_id.write_date,
+            sorted((line.id, line.write_date) for line in self.line_ids),
+        ]
+        return hashlib.sha256(repr(inputs).encode()).hexdigest()
+
+    def _get_cached_bill_pdf(self):
+        """Return the cached PDF attachment if it is still up to date, else an empty recordset."""
+        self.ensure_one()
+        report = self.env['ir.actions.report'].sudo()._get_report_from_name(BILL_REPORT_NAME)
+        if report and self.bill_pdf_attachment_id \
+                and self.bill_pdf_cache_key == self._get_bill_pdf_cache_key(report):
+            return self.bill_pdf_attachment_id
+        return self.env['ir.attachment']
+
+    def _get_bill_pdf_attachment(self):
+        """Return the attachment holding this bill's PDF, rendering it only when the cache is stale."""
+        self.ensure_one()
+        attachment = self._get_cached_bill_pdf()
+        self._count_bill_pdf_cache_access(bool(attachment))
+        return attachment or self._render_bill_pdf()
+
+    def _render_bill_pdf(self):
+        """Render the bill PDF and store it as the bill's cached attachment."""
+        self.ensure_one()
+        report = self.env['ir.actions.report'].sudo()._get_report_from_name(BILL_REPORT_NAME)
+        if not report:
+            return self.env['ir.attachment']
+
+        cache_key = self._get_bill_pdf_cache_key(report)
+        pdf_content = report._render_qweb_pdf(report.report_name, res_ids=[self.id])[0]
+        if not pdf_content:
+            return self.env['ir.attachment']
+
+        attachment = self.bill_pdf_attachment_id
+        attachment_vals = {
+            'name': f'Bill_{self.name or str(self.id)}.pdf',
+            'type': 'binary',
+            'datas': base64.b64encode(pdf_content),
+            'res_model': 'account.move',
+            'res_id': self.id,
+            'mimetype': 'application/pdf',
+        }
+        if attachment:
+            # Overwrite in place so the filestore keeps a single PDF per bill
+            attachment.write(attachment_vals)
+        else:
+            attachment = self.env['ir.attachment'].sudo().create(attachment_vals)
+        # Storing the key must not bump write_date, or the key would change again
+        self.env.cr.execute(
+            "UPDATE account_move SET bill_pdf_attachment_id = %s, bill_pdf_cache_key = %s WHERE id = %s",
+            [attachment.id, cache_key, self.id])
+        self.invalidate_recordset(['bill_pdf_attachment_id', 'bill_pdf_cache_key'])
+        return attachment
+
+    @api.model
+    def _count_bill_pdf_cache_access(self, hit):
+        counter = 'hits' if hit else 'misses'
+        # Sequences are not transactional, the access counts even if the request rolls back
+        self.env.cr.execute(f"SELECT nextval('{BILL_PDF_CACHE_SEQUENCES[counter]}')")
+        _logger.debug("Bill PDF cache %s (%s=%d)", counter, counter, self.env.cr.fetchone()[0])
+
+    @api.model
+    def _get_bill_pdf_cache_stats(self):
+        stats = {}
+        for counter, sequence in BILL_PDF_CACHE_SEQUENCES.items():
+            self.env.cr.execute(f"SELECT last_value, is_called FROM {sequence}")
+            last_value, is_called = self.env.cr.fetchone()
+            stats[counter] = last_value if is_called else 0
+        total = stats['hits'] + stats['misses']
+        return {**stats, 'hit_ratio': round(stats['hits'] / total, 4) if total else 0.0}
+
+    def action_post_in_background(self):
+        bills = self.filtered(lambda move: move.is_bill and move.state == 'draft')
+        if bills:
+            self.env['bill.job']._enqueue(f"Post {len(bills)} bill(s)", 'account.move', '_job_post_bills',
+                                          bills.ids)
+
+    @api.model
+    def _job_create_electric_bill(self, vals):
+        # The uploaded photo waits in an attachment of its own, moved onto the bill here
+        image_attachment = self.env['ir.attachment'].sudo().browse(vals.pop('image_attachment_id', False)).exists()
+        if image_attachment:
+            vals['electric_bill_image'] = image_attachment.datas
+        bill = self.sudo()._create_electric_bills([vals])
+        image_attachment.unlink()
+        return {
+            'bill_id': bill.id,
+            'invoice_name': bill.name,
+            'partner_name': bill.partner_id.name,
+            'meter_id': bill.meter_id,
+        }
+
+    @api.model
+    def _job_post_bills(self, bill_ids):
+        bills = self.sudo().browse(bill_ids).exists().filtered(lambda move: move.state == 'draft')
+        bills.action_post()
+        return {'posted': len(bills)}
+
+    @api.model
+    def _job_render_bill_pdf(self, bill_id):
+        bill = self.sudo().browse(bill_id).exists()
+        attachment = (bill._get_cached_bill_pdf() or bill._render_bill_pdf()) if bill else False
+        return {'attachment_id': attachment.id if attachment else False}
+
+    @api.model
+    def _get_bill_line_templates(self):
+        """Resolve the bill product and charge accounts once.
+
+        Returns the list of invoice line values shared by every electric bill:
+        the "Units" product line first, then one line per charge account.
+        """
+        templates = []
+        product = self.env['product.product'].search([('name', '=', BILL_PRODUCT_NAME)], limit=1)
+        if product:
+            templates.append({'product_id': product.id})
+
+        accounts = {}
+        for account in self.env['account.account'].search([('code', 'in', BILL_ACCOUNT_CODES)]):
+            accounts.setdefault(account.code, account)
+        for code in BILL_ACCOUNT_CODES:
+            if code in accounts:
+                templates.append({'account_id': accounts[code].id})
+        return templates
+
+    @api.model
+    def _prepare_electric_bill_vals(self, partner_id, next_reading, line_templates, **bill_vals):
+        invoice_lines = []
+        for template in line_templates:
+            line_vals = dict(template)
+            if 'product_id' in line_vals:
+                line_vals['next_reading_unit'] = next_reading
+            invoice_lines.append((0, 0, line_vals))
+
+        return {
+            'move_type': 'out_invoice',
+            'is_bill': True,
+            'partner_id': partner_id,
+            'invoice_line_ids': invoice_lines,
+            **bill_vals,
+        }
+
+    @api.model
+    def _create_electric_bills(self, vals_list):
+        """Create bills in one batch, their first line carrying the previous reading.
+
+        The previous readings of all bills are resolved with one query before
+        the create, so no bill is written a second time.
+        """
+        readings = self.env['meter.reading']._get_readings_before([
+            (False, vals['partner_id'], vals.get('billing_month')) for vals in vals_list
+        ])
+        vals_list = [dict(vals) for vals in vals_list]
+        for vals, reading in zip(vals_list, readings):
+            lines = [list(command) for command in vals.get('invoice_line_ids', [])]
+            if lines:
+                lines[0][2] = {**lines[0][2], 'previous_reading_unit': reading or 0.0}
+                vals['invoice_line_ids'] = [tuple(command) for command in lines]
+        bills = self.create(vals_list)
+        self.env['bill.tariff']._price_bills(bills)
+        return bills
 
 
 class AccountMoveLineInherit(models.Model):
@@ -56,6 +336,8 @@ class AccountMoveLineInherit(models.Model):
 
     previous_reading_unit = fields.Float(string='Previous Reading', digits=(10, 2))
     next_reading_unit = fields.Float(string='Next Reading', digits=(10, 2))
+    is_tariff_fixed_charge = fields.Boolean(string='Tariff Fixed Charge',
+                                            help="Line billing the fixed charge of the bill's tariff.")
     # consumed_unit = fields.Float(string='Consumed Unit', digits=(10, 2), compute='_compute_consumed_unit', store=True)
 
     quantity = fields.Float(
@@ -68,7 +350,8 @@ class AccountMoveLineInherit(models.Model):
         help="Auto-calculated based on reading if is_bill is True. Otherwise defaults to 1.",
     )
 
-    @api.depends('previous_reading_unit', 'next_reading_unit', 'move_id.is_bill', 'move_id.move_type', 'display_type')
+    @api.depends('previous_reading_unit', 'next_reading_unit', 'move_id.is_bill', 'move_id.move_type', 'display_type',
+                 'is_tariff_fixed_charge')
     def _compute_quantity(self):
         for rec in self:
             if rec.display_type != 'product':
@@ -77,19 +360,8 @@ class AccountMoveLineInherit(models.Model):
                     rec.move_id
                     and rec.move_id.is_bill
                     and rec.move_id.move_type == 'out_invoice'
+                    and not rec.is_tariff_fixed_charge
             ):
                 rec.quantity = (rec.next_reading_unit or 0.0) - (rec.previous_reading_unit or 0.0)
             else:
                 rec.quantity = rec.quantity or 1
-
-    @api.onchange('next_reading_unit', 'move_id')
-    def _onchange_next_reading_unit(self):
-        for rec in self:
-            if not rec.next_reading_unit or not rec.move_id:
-                continue
-            partner = rec.move_id.partner_id
-            if not partner:
-                continue
-            partner.partner_previous_reading = rec.next_reading_unit
-
-            partner.write({'partner_previous_reading': rec.next_reading_unit})
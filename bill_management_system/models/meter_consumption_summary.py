@@ -0,0 +1,160 @@
+import logging
+import time
+
+from odoo import api, fields, models
+
+_logger = logging.getLogger(__name__)
+
+# Last time the summary caught up with bill changes (payments, edits) outside of posting
+REFRESH_PARAM = 'bill_management_system.consumption_summary_refreshed_at'
+
+
+class MeterConsumptionSummary(models.Model):
+    _name = 'meter.consumption.summary'
+    _description = 'Monthly Meter Consumption'
+    _order = 'billing_month desc, meter_id'
+    _rec_name = 'meter_id'
+
+    partner_id = fields.Many2one('res.partner', string='Customer', required=True, ondelete='cascade',
+                                 readonly=True)
+    meter_id = fields.Char(string='Meter ID', readonly=True, index=True)
+    city = fields.Char(string='City', readonly=True)
+    state_id = fields.Many2one('res.country.state', string='Area', readonly=True)
+    billing_month = fields.Date(string='Billing Month', required=True, readonly=True, index=True,
+                                help="First day of the billing month.")
+    bill_count = fields.Integer(string='Bills', readonly=True, aggregator='sum')
+    units_consumed = fields.Float(string='Units Consumed', digits=(16, 2), readonly=True, aggregator='sum')
+    amount_billed = fields.Float(string='Amount Billed', digits=(16, 2), readonly=True, aggregator='sum')
+    amount_outstanding = fields.Float(string='Amount Outstanding', digits=(16, 2), readonly=True,
+                                      aggregator='sum')
+
+    _sql_constraints = [
+        ('partner_month_uniq', 'unique(partner_id, billing_month)',
+         'There can only be one consumption summary per customer and month.'),
+    ]
+
+    @api.model
+    def _refresh_for_bills(self, bills):
+        """Recompute the (customer, month) rows touched by ``bills``."""
+        keys = {
+            (bill.partner_id.id, bill.billing_month.replace(day=1))
+            for bill in bills if bill.is_bill and bill.partner_id and bill.billing_month
+        }
+        self._refresh_keys(keys)
+
+    @api.model
+    def _refresh_keys(self, keys=None):
+        """Upsert the summary rows of the given ``(partner_id, month_start)`` keys, or of every key when None.
+
+        Rows whose bills are no longer posted are removed.
+        """
+        if keys is not None and not keys:
+            return
+        self.env['account.move'].flush_model()
+        self.env['account.move.line'].flush_model()
+        self.env['res.partner'].flush_model(['meter_id', 'city', 'state_id'])
+
+        key_filter = ""
+        params = {'uid': self.env.uid}
+        if keys is not None:
+            partner_ids, months = zip(*keys)
+            key_filter = """
+               AND (move.partner_id, DATE_TRUNC('month', move.billing_month)::date)
+                   IN (SELECT * FROM unnest(%(partner_ids)s::int[], %(months)s::date[]))"""
+            params.update(partner_ids=list(partner_ids), months=list(months))
+        else:
+            self.env.cr.execute("DELETE FROM meter_consumption_summary")
+
+        self.env.cr.execute(f"""
+            INSERT INTO meter_consumption_summary (partner_id, billing_month, meter_id, city, state_id,
+                                                   bill_count, units_consumed, amount_billed,
+                                                   amount_outstanding,
+                                                   create_uid, create_date, write_uid, write_date)
+            SELECT move.partner_id,
+                   DATE_TRUNC('month', move.billing_month)::date,
+                   MAX(partner.meter_id), MAX(partner.city), MAX(partner.state_id),
+                   COUNT(*), COALESCE(SUM(units.quantity), 0),
+                   SUM(move.amount_total), SUM(move.amount_residual),
+                   %(uid)s, NOW() AT TIME ZONE 'UTC', %(uid)s, NOW() AT TIME ZONE 'UTC'
+              FROM account_move move
+              JOIN res_partner partner ON partner.id = move.partner_id
+              LEFT JOIN LATERAL (
+                    SELECT SUM(line.quantity) AS quantity
+                      FROM account_move_line line
+                     WHERE line.move_id = move.id
+                       AND line.display_type = 'product'
+                       AND line.is_tariff_fixed_charge IS NOT TRUE
+              ) AS units ON TRUE
+             WHERE move.is_bill IS TRUE
+               AND move.state = 'posted'
+               AND move.billing_month IS NOT NULL{key_filter}
+          GROUP BY move.partner_id, DATE_TRUNC('month', move.billing_month)::date
+                ON CONFLICT (partner_id, billing_month) DO UPDATE
+               SET meter_id = EXCLUDED.meter_id,
+                   city = EXCLUDED.city,
+                   state_id = EXCLUDED.state_id,
+                   bill_count = EXCLUDED.bill_count,
+                   units_consumed = EXCLUDED.units_consumed,
+                   amount_billed = EXCLUDED.amount_billed,
+                   amount_outstanding = EXCLUDED.amount_outstanding,
+                   write_uid = EXCLUDED.write_uid,
+                   write_date = EXCLUDED.write_date
+        """, params)
+
+        if keys is not None:
+            self.env.cr.execute("""
+                DELETE FROM meter_consumption_summary summary
+                 USING unnest(%(partner_ids)s::int[], %(months)s::date[]) AS key(partner_id, billing_month)
+                 WHERE summary.partner_id = key.partner_id
+                   AND summary.billing_month = key.billing_month
+                   AND NOT EXISTS (
+                        SELECT 1 FROM account_move move
+                         WHERE move.partner_id = key.partner_id
+                           AND move.is_bill IS TRUE
+                           AND move.state = 'posted'
+                           AND DATE_TRUNC('month', move.billing_month)::date = key.billing_month)
+            """, params)
+        self.invalidate_model()
+
+    @api.model
+    def _cron_refresh_summary(self):
+        """Catch up with bills changed since the last run, e.g. by payments lowering amount_residual."""
+        started = time.perf_counter()
+        params = self.env['ir.config_parameter'].sudo()
+        now = fields.Datetime.now()
+        refreshed_at = params.get_param(REFRESH_PARAM)
+        if not refreshed_at:
+            self._refresh_keys()
+        else:
+            self.env.cr.execute("""
+                SELECT DISTINCT partner_id, DATE_TRUNC('month', billing_month)::date
+                  FROM account_move
+                 WHERE is_bill IS TRUE
+                   AND partner_id IS NOT NULL
+                   AND billing_month IS NOT NULL
+                   AND write_date >= %s
+            """, [refreshed_at])
+            self._refresh_keys(set(self.env.cr.fetchall()))
+        params.set_param(REFRESH_PARAM, fields.Datetime.to_string(now))
+        _logger.info("Consumption summary refreshed in %.2fs", time.perf_counter() - started)
+
+    @api.model
+    def _get_consumption_series(self, domain, groupby='billing_month:month'):
+        """Aggregated units and amounts for portal charts, one entry per group."""
+        groups = self._read_group(domain, [groupby],
+                                  ['units_consumed:sum', 'amount_billed:sum', 'amount_outstanding:sum'])
+        series = []
+        for group, units_consumed, amount_billed, amount_outstanding in groups:
+            if isinstance(group, models.BaseModel):
+                label = group.display_name
+            elif hasattr(group, 'strftime'):
+                label = group.strftime('%Y-%m')
+            else:
+                label = group or ''
+            series.append({
+                'label': label,
+                'units_consumed': units_consumed,
+                'amount_billed': amount_billed,
+                'amount_outstanding': amount_outstanding,
+            })
+        return series
@@ -0,0 +1,134 @@
+from odoo import api, fields, models
+from odoo.tools.sql import create_index
+
+
+class MeterReading(models.Model):
+    _name = 'meter.reading'
+    _description = 'Meter Reading'
+    _order = 'billing_month desc, id desc'
+    _rec_name = 'meter_id'
+
+    partner_id = fields.Many2one('res.partner', string='Customer', required=True, ondelete='cascade')
+    meter_id = fields.Char(string='Meter ID')
+    move_id = fields.Many2one('account.move', string='Bill', ondelete='cascade', index=True)
+    billing_month = fields.Date(string='Billing Month', required=True)
+    reading_date = fields.Date(string='Reading Date')
+    previous_reading = fields.Float(string='Previous Reading', digits=(10, 2))
+    reading = fields.Float(string='Reading', digits=(10, 2))
+    consumed_units = fields.Float(string='Consumed Units', digits=(10, 2))
+
+    _sql_constraints = [
+        ('move_uniq', 'unique(move_id)', 'A bill can only record one meter reading.'),
+    ]
+
+    def init(self):
+        super().init()
+        # Every "last reading before this month" lookup is a single probe on this index
+        create_index(self.env.cr, 'meter_reading_partner_month_index', self._table,
+                     ['partner_id', 'billing_month DESC', 'id DESC'])
+
+    @api.model
+    def _get_previous_readings(self, moves):
+        """Return ``{move.id: reading}`` with the last recorded reading before each move's billing month.
+
+        The move's own reading is ignored and the billing month defaults to today.
+        Moves without an earlier reading are left out of the result.
+        """
+        moves = list(moves)
+        readings = self._get_readings_before([
+            (move._origin.id, move.partner_id.id, move.billing_month) for move in moves
+        ])
+        return {move.id: reading for move, reading in zip(moves, readings) if reading is not None}
+
+    @api.model
+    def _get_readings_before(self, keys):
+        """Return the last reading before each ``(move_id, partner_id, billing_month)`` of ``keys``, in order.
+
+        ``move_id`` may be False for bills not created yet, the billing month
+        defaults to today. Keys without an earlier reading get None.
+        """
+        if not keys:
+            return []
+        self.flush_model()
+        today = fields.Date.today()
+        self.env.cr.execute("""
+            SELECT cur.position, last_reading.reading
+              FROM unnest(%s::int[], %s::int[], %s::date[])
+                   WITH ORDINALITY AS cur(move_id, partner_id, billing_month, position)
+              CROSS JOIN LATERAL (
+                    SELECT mr.reading
+                      FROM meter_reading mr
+                     WHERE mr.partner_id = cur.partner_id
+                       AND mr.billing_month < cur.billing_month
+                       AND mr.move_id IS DISTINCT FROM cur.move_id
+                  ORDER BY mr.billing_month DESC, mr.id DESC
+                     LIMIT 1
+              ) AS last_reading
+        """, [
+            [move_id or 0 for move_id, _partner_id, _billing_month in keys],
+            [partner_id for _move_id, partner_id, _billing_month in keys],
+            [fields.Date.to_date(billing_month) or today for _move_id, _partner_id, billing_month in keys],
+        ])
+        readings = [None] * len(keys)
+        for position, reading in self.env.cr.fetchall():
+            readings[position - 1] = reading
+        return readings
+
+    @api.model
+    def _get_latest_readings(self, partner_ids):
+        """Return ``{partner_id: reading}`` with the most recent reading of each partner."""
+        if not partner_ids:
+            return {}
+        self.flush_model()
+        self.env.cr.execute("""
+            SELECT DISTINCT ON (partner_id) partner_id, reading
+              FROM meter_reading
+             WHERE partner_id = ANY(%s)
+          ORDER BY partner_id, billing_month DESC, id DESC
+        """, [list(partner_ids)])
+        return dict(self.env.cr.fetchall())
+
+    @api.model
+    def _record_bill_readings(self, bills):
+        """Write one ledger row per posted bill, skipping bills already recorded."""
+        recorded = set(self.search([('move_id', 'in', bills.ids)]).move_id.ids)
+        vals_list = []
+        for bill in bills:
+            if bill.id in recorded or not bill.partner_id:
+                continue
+            line = bill.invoice_line_ids[:1]
+            vals_list.append({
+                'partner_id': bill.partner_id.id,
+                'meter_id': bill.partner_id.meter_id,
+                'move_id': bill.id,
+                'billing_month': bill.billing_month or bill.date,
+                'reading_date': bill.reading_date,
+                'previous_reading': line.previous_reading_unit,
+                'reading': line.next_reading_unit,
+                'consumed_units': line.quantity,
+            })
+        return self.create(vals_list)
+
+    @api.model
+    def _backfill_from_bills(self):
+        """Record the readings of posted bills that predate the ledger."""
+        self.env['account.move'].flush_model()
+        self.env['account.move.line'].flush_model()
+        self.env.cr.execute("""
+            INSERT INTO meter_reading (partner_id, meter_id, move_id, billing_month, reading_date,
+                                       previous_reading, reading, consumed_units,
+                                       create_uid, create_date, write_uid, write_date)
+            SELECT DISTINCT ON (move.id)
+                   move.partner_id, partner.meter_id, move.id, COALESCE(move.billing_month, move.date),
+                   move.reading_date, line.previous_reading_unit, line.next_reading_unit, line.quantity,
+                   %(uid)s, NOW() AT TIME ZONE 'UTC', %(uid)s, NOW() AT TIME ZONE 'UTC'
+              FROM account_move move
+              JOIN res_partner partner ON partner.id = move.partner_id
+              JOIN account_move_line line ON line.move_id = move.id
+                                         AND line.display_type IN ('product', 'line_section', 'line_note')
+             WHERE move.is_bill IS TRUE
+               AND move.state = 'posted'
+               AND NOT EXISTS (SELECT 1 FROM meter_reading mr WHERE mr.move_id = move.id)
+          ORDER BY move.id, line.id
+        """, {'uid': self.env.uid})
+        self.invalidate_model()
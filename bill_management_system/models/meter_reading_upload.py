@@ -0,0 +1,169 @@
+import logging
+
+from odoo import api, fields, models
+from odoo.tools import float_compare
+
+_logger = logging.getLogger(__name__)
+
+DATE_KEYS = ('billing_month', 'reading_date', 'issue_date', 'due_date')
+
+
+class MeterReadingUpload(models.Model):
+    _name = 'meter.reading.upload'
+    _description = 'Uploaded Meter Reading'
+    _order = 'id desc'
+    _rec_name = 'idempotency_key'
+
+    idempotency_key = fields.Char(string='Idempotency Key', required=True, readonly=True,
+                                  help="Client supplied key, an upload with a known key is not processed again.")
+    user_id = fields.Many2one('res.users', string='Uploaded By', default=lambda self: self.env.user,
+                              required=True, readonly=True)
+    partner_id = fields.Many2one('res.partner', string='Customer', readonly=True, ondelete='set null')
+    meter_id = fields.Char(string='Meter ID', readonly=True)
+    next_reading = fields.Float(string='Reading', digits=(10, 2), readonly=True)
+    reading_date = fields.Date(string='Reading Date', readonly=True)
+    photo_ref = fields.Char(string='Photo Reference', readonly=True)
+    move_id = fields.Many2one('account.move', string='Bill', readonly=True, ondelete='set null')
+
+    _sql_constraints = [
+        ('idempotency_key_uniq', 'unique(idempotency_key)', 'This reading has already been uploaded.'),
+    ]
+
+    @api.model
+    def _ingest_batch(self, items):
+        """Create draft bills for a batch of uploaded readings.
+
+        ``items`` is a list of dicts with ``idempotency_key``, ``meter_id``,
+        ``next_reading`` and optionally ``reading_date``, ``billing_month``,
+        ``issue_date``, ``due_date`` and ``photo_ref``. Returns one result dict
+        per item, in order, with a ``status`` of ``created``, ``duplicate`` or
+        ``rejected``. Rejected items are not remembered, so they can be fixed
+        and sent again with the same key.
+        """
+        results = [None] * len(items)
+        items = [item if isinstance(item, dict) else {'__error__': "Each reading must be a JSON object."}
+                 for item in items]
+        keys = [str(item.get('idempotency_key') or '').strip() for item in items]
+
+        # Keys already processed, by an earlier upload or earlier in this batch
+        known = {
+            upload['idempotency_key']: upload['move_id'] and upload['move_id'][0]
+            for upload in self.sudo().search_read([('idempotency_key', 'in', [key for key in keys if key])],
+                                                  ['idempotency_key', 'move_id'])
+        }
+
+        meter_ids = {str(item.get('meter_id') or '').strip() for item in items}
+        partners = self.env['res.partner'].sudo().search_read(
+            [('meter_id', 'in', list(meter_ids))], ['meter_id'])
+        partner_by_meter = {partner['meter_id']: partner['id'] for partner in partners}
+        last_readings = self.env['meter.reading']._get_latest_readings(list(partner_by_meter.values()))
+
+        bill_model = self.env['account.move'].sudo()
+        line_templates = bill_model._get_bill_line_templates()
+        pending = []
+        seen = set()
+        for position, (key, item) in enumerate(zip(keys, items)):
+            if key in known or key in seen:
+                results[position] = {'idempotency_key': key, 'status': 'duplicate', 'bill_id': known.get(key)}
+                continue
+            try:
+                upload_vals, bill_vals = self._prepare_upload(key, item, partner_by_meter, last_readings,
+                                                              line_templates)
+            except ValueError as e:
+                results[position] = {'idempotency_key': key, 'status': 'rejected', 'error': str(e)}
+                continue
+            seen.add(key)
+            # Later readings of the same meter in this batch are checked against this one
+            last_readings[upload_vals['partner_id']] = upload_vals['next_reading']
+            pending.append((position, upload_vals, bill_vals))
+
+        if pending:
+            try:
+                with self.env.cr.savepoint():
+                    self._create_uploads(pending, results)
+            except Exception:
+                _logger.info("Reading upload: batch create failed, retrying %d readings one by one", len(pending))
+                for entry in pending:
+                    try:
+                        with self.env.cr.savepoint():
+                            self._create_uploads([entry], results)
+                    except Exception as e:
+                        position, upload_vals, _bill_vals = entry
+                        key = upload_vals['idempotency_key']
+                        # A concurrent upload may have taken the key in the meantime
+                        upload = self.sudo().search([('idempotency_key', '=', key)], limit=1)
+                        if upload:
+                            results[position] = {'idempotency_key': key, 'status': 'duplicate',
+                                                 'bill_id': upload.move_id.id}
+                        else:
+                            results[position] = {'idempotency_key': key, 'status': 'rejected', 'error': str(e)}
+
+        # Repeated keys within the batch point to the bill created for their first occurrence
+        bill_by_key = {result['idempotency_key']: result['bill_id']
+                       for result in results if result['status'] == 'created'}
+        for result in results:
+            if result['status'] == 'duplicate' and not result['bill_id']:
+                result['bill_id'] = bill_by_key.get(result['idempotency_key'])
+        return results
+
+    @api.model
+    def _create_uploads(self, pending, results):
+        bills = self.env['account.move'].sudo()._create_electric_bills([bill_vals for _p, _u, bill_vals in pending])
+        self.sudo().create([
+            dict(upload_vals, move_id=bill.id) for (_p, upload_vals, _b), bill in zip(pending, bills)
+        ])
+        # Surface unique key violations from concurrent uploads inside the savepoint
+        self.env.flush_all()
+        for (position, upload_vals, _bill_vals), bill in zip(pending, bills):
+            results[position] = {'idempotency_key': upload_vals['idempotency_key'], 'status': 'created',
+                                 'bill_id': bill.id, 'bill_name': bill.name}
+
+    @api.model
+    def _prepare_upload(self, key, item, partner_by_meter, last_readings, line_templates):
+        """Validate one uploaded reading, return its ``(upload_vals, bill_vals)``."""
+        if item.get('__error__'):
+            raise ValueError(item['__error__'])
+        if not key:
+            raise ValueError("Missing idempotency_key.")
+
+        meter_id = str(item.get('meter_id') or '').strip()
+        if not meter_id:
+            raise ValueError("Missing meter_id.")
+        partner_id = partner_by_meter.get(meter_id)
+        if not partner_id:
+            raise ValueError(f"No customer found for meter {meter_id}.")
+
+        try:
+            next_reading = float(item.get('next_reading'))
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid next_reading: {item.get('next_reading')!r}.")
+        last_reading = last_readings.get(partner_id, 0.0)
+        if float_compare(next_reading, last_reading, precision_digits=2) < 0:
+            raise ValueError(f"Reading {next_reading} is below the last reading {last_reading} of meter {meter_id}.")
+
+        dates = {}
+        for name in DATE_KEYS:
+            value = str(item.get(name) or '').strip()
+            try:
+                dates[name] = fields.Date.from_string(value) if value else False
+            except ValueError:
+                raise ValueError(f"Invalid {name}: {value!r}, expected YYYY-MM-DD.")
+        reading_date = dates['reading_date'] or fields.Date.context_today(self)
+
+        upload_vals = {
+            'idempotency_key': key,
+            'user_id': self.env.uid,
+            'partner_id': partner_id,
+            'meter_id': meter_id,
+            'next_reading': next_reading,
+            'reading_date': reading_date,
+            'photo_ref': str(item.get('photo_ref') or '').strip() or False,
+        }
+        bill_vals = self.env['account.move']._prepare_electric_bill_vals(
+            partner_id, next_reading, line_templates,
+            billing_month=dates['billing_month'] or reading_date.replace(day=1),
+            reading_date=reading_date,
+            issue_date=dates['issue_date'],
+            invoice_date_due=dates['due_date'],
+        )
+        return upload_vals, bill_vals
@@ -1,10 +1,47 @@
 from odoo import _, api, fields, models
+from odoo.tools import escape_psql
 
 
 class ResPartnerInherit(models.Model):
     _inherit = 'res.partner'
 
-    meter_id = fields.Char(string='Meter ID', required=True)
-    reference_no = fields.Char(string='Reference Number', required=True)
-    partner_previous_reading = fields.Float(string='Previous Reading Unit', readonly=True)
+    # Trigram indexes serve the prefix search of the bill form autocomplete;
+    # exact meter lookups use the unique constraint's index.
+    meter_id = fields.Char(string='Meter ID', required=True, index='trigram', copy=False)
+    reference_no = fields.Char(string='Reference Number', required=True, index='trigram')
+    partner_previous_reading = fields.Float(string='Previous Reading Unit', readonly=True,
+                                            compute='_compute_partner_previous_reading')
     cnic = fields.Char(string='CNIC', required=True)
+    meter_reading_ids = fields.One2many('meter.reading', 'partner_id', string='Meter Readings')
+    bill_tariff_id = fields.Many2one('bill.tariff', string='Tariff',
+                                     help="Tariff the customer's bills are priced on, the first tariff when empty.")
+
+    _sql_constraints = [
+        ('meter_id_uniq', 'unique(meter_id)', 'This Meter ID is already assigned to another customer.'),
+    ]
+
+    @api.model
+    def _search_bill_customers(self, term, limit=20):
+        """Prefix search on meter ID, reference number and name for the bill form autocomplete."""
+        term = (term or '').strip()
+        if not term:
+            return []
+        prefix = escape_psql(term) + '%'
+        partners = self.search([
+            '|', '|',
+            ('meter_id', '=ilike', prefix),
+            ('reference_no', '=ilike', prefix),
+            ('complete_name', '=ilike', prefix),
+        ], limit=limit, order='meter_id')
+        return [{
+            'id': partner.id,
+            'name': partner.name,
+            'meter_id': partner.meter_id,
+            'reference_no': partner.reference_no,
+            'previous_reading_unit': partner.partner_previous_reading,
+        } for partner in partners]
+
+    def _compute_partner_previous_reading(self):
+        readings = self.env['meter.reading']._get_latest_readings(self._origin.ids)
+        for partner in self:
+            partner.partner_previous_reading = readings.get(partner._origin.id, 0.0)
@@ -0,0 +1 @@
+from . import report_lesco_bill
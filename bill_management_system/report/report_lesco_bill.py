@@ -0,0 +1,109 @@
+from collections import defaultdict
+
+from odoo import api, models
+
+# Months of past consumption printed on each bill
+CONSUMPTION_HISTORY_MONTHS = 12
+
+
+class ReportLescoBill(models.AbstractModel):
+    _name = 'report.bill_management_system.report_lesco_bill_template'
+    _description = 'Electricity Bill Report'
+
+    @api.model
+    def _get_report_values(self, docids, data=None):
+        docs = self.env['account.move'].browse(docids)
+        return {
+            'doc_ids': docids,
+            'doc_model': 'account.move',
+            'docs': docs,
+            'bill_values': self._get_bill_values(docs),
+        }
+
+    @api.model
+    def _get_bill_values(self, docs):
+        """Plain values for every bill, loaded with a fixed number of queries whatever the number of bills.
+
+        The template reads from these dicts instead of walking invoice lines,
+        taxes and partners through the ORM for every printed figure.
+        """
+        lines_by_move = defaultdict(list)
+        lines = self.env['account.move.line'].search_read(
+            [('move_id', 'in', docs.ids), ('display_type', 'in', ('product', 'line_section', 'line_note'))],
+            ['move_id', 'price_unit', 'quantity', 'next_reading_unit', 'price_subtotal', 'price_total',
+             'tax_ids', 'is_tariff_fixed_charge'])
+        # The tariff's fixed charge line is printed on its own, the other lines are read by position
+        fixed_charge_by_move = defaultdict(float)
+        for line in lines:
+            if line['is_tariff_fixed_charge']:
+                fixed_charge_by_move[line['move_id'][0]] += line['price_subtotal']
+            else:
+                lines_by_move[line['move_id'][0]].append(line)
+
+        tax_ids = {tax_id for line in lines for tax_id in line['tax_ids']}
+        taxes = {tax['id']: tax for tax in self.env['account.tax'].browse(tax_ids).read(['name', 'amount'])}
+
+        partners = {
+            partner['id']: partner
+            for partner in docs.partner_id.read(['name', 'contact_address', 'cnic'])
+        }
+        history = self._get_consumption_history(docs.partner_id.ids)
+
+        bill_values = {}
+        for move in docs:
+            move_lines = lines_by_move[move.id]
+            first_line = move_lines[0] if move_lines else {}
+
+            def price_unit(index):
+                return move_lines[index]['price_unit'] if len(move_lines) > index else 0.0
+
+            sales_tax = (first_line['price_total'] - first_line['price_subtotal']) if first_line else 0.0
+            partner = partners.get(move.partner_id.id, {})
+            bill_values[move.id] = {
+                'has_lines': bool(move_lines),
+                'partner_name': partner.get('name') or '',
+                'partner_address': partner.get('contact_address') or '',
+                'partner_cnic': partner.get('cnic') or '',
+                'price_unit': price_unit(0),
+                'next_reading': first_line.get('next_reading_unit', 0.0),
+                'quantity': first_line.get('quantity', 0.0),
+                'energy_charges': first_line.get('quantity', 0.0) * price_unit(0),
+                'fixed_charges': fixed_charge_by_move[move.id],
+                'fuel_price_adjustment': price_unit(1),
+                'sales_tax_label': ' '.join(
+                    f"{taxes[tax_id]['name']} ({taxes[tax_id]['amount']}%)"
+                    for tax_id in first_line.get('tax_ids', [])
+                ) if first_line else 'No Tax',
+                'sales_tax': sales_tax,
+                'further_tax': price_unit(2),
+                'extra_tax': price_unit(3),
+                'value_incl_sales_tax': (sum(line['price_subtotal'] for line in move_lines[:4])
+                                         + fixed_charge_by_move[move.id] + sales_tax),
+                'income_tax': price_unit(4),
+                'consumption_history': [
+                    reading for reading in history.get(move.partner_id.id, [])
+                    if not move.billing_month or reading['billing_month'] <= move.billing_month
+                ][:CONSUMPTION_HISTORY_MONTHS],
+            }
+        return bill_values
+
+    @api.model
+    def _get_consumption_history(self, partner_ids):
+        """Return ``{partner_id: [{'billing_month', 'consumed_units'}, ...]}``, latest month first."""
+        if not partner_ids:
+            return {}
+        self.env['meter.reading'].flush_model()
+        # Enough rows per partner to still fill the table when printing older bills
+        self.env.cr.execute("""
+            SELECT partner_id, billing_month, consumed_units
+              FROM (SELECT partner_id, billing_month, consumed_units,
+                           ROW_NUMBER() OVER (PARTITION BY partner_id ORDER BY billing_month DESC, id DESC) AS rank
+                      FROM meter_reading
+                     WHERE partner_id = ANY(%s)) AS readings
+             WHERE rank <= %s
+          ORDER BY partner_id, billing_month DESC
+        """, [list(partner_ids), CONSUMPTION_HISTORY_MONTHS * 2])
+        history = defaultdict(list)
+        for partner_id, billing_month, consumed_units in self.env.cr.fetchall():
+            history[partner_id].append({'billing_month': billing_month, 'consumed_units': consumed_units})
+        return history
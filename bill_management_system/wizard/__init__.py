@@ -0,0 +1 @@
+from . import bill_import_wizard
@@ -0,0 +1,187 @@
+import base64
+import csv
+import io
+import json
+import logging
+import time
+
+from odoo import models, fields, api
+from odoo.exceptions import UserError
+
+_logger = logging.getLogger(__name__)
+
+DATE_COLUMNS = ('billing_month', 'reading_date', 'issue_date', 'due_date')
+
+
+class BillImportWizard(models.TransientModel):
+    _name = 'bill.import.wizard'
+    _description = 'Import Meter Readings'
+
+    import_file = fields.Binary(string='File', required=True,
+                                help="CSV or NDJSON file with one meter reading per row.")
+    import_filename = fields.Char(string='File Name')
+    file_format = fields.Selection([
+        ('csv', 'CSV'),
+        ('ndjson', 'NDJSON'),
+    ], string='Format', compute='_compute_file_format', store=True, readonly=False, required=True)
+    batch_size = fields.Integer(string='Batch Size', default=500,
+                                help="Number of bills created per create() call.")
+
+    state = fields.Selection([('draft', 'Draft'), ('done', 'Done')], default='draft')
+    rows_total = fields.Integer(string='Rows Read', readonly=True)
+    rows_created = fields.Integer(string='Bills Created', readonly=True)
+    rows_failed = fields.Integer(string='Rows Failed', readonly=True)
+    rows_per_second = fields.Float(string='Rows / Second', digits=(16, 1), readonly=True)
+    error_log = fields.Text(string='Errors', readonly=True)
+
+    @api.depends('import_filename')
+    def _compute_file_format(self):
+        for wizard in self:
+            filename = (wizard.import_filename or '').lower()
+            if filename.endswith(('.ndjson', '.jsonl', '.json')):
+                wizard.file_format = 'ndjson'
+            else:
+                wizard.file_format = wizard.file_format or 'csv'
+
+    def action_import(self):
+        self.ensure_one()
+        if not self.import_file:
+            raise UserError("Please upload a file to import.")
+        if self.batch_size <= 0:
+            raise UserError("Batch size must be greater than zero.")
+
+        started = time.perf_counter()
+        importer = self.env['account.move']
+        line_templates = importer._get_bill_line_templates()
+
+        total = created = 0
+        errors = []
+        batch = []
+        for row_no, row in self._iter_rows():
+            total += 1
+            batch.append((row_no, row))
+            if len(batch) >= self.batch_size:
+                created += self._import_batch(batch, line_templates, errors)
+                batch = []
+        if batch:
+            created += self._import_batch(batch, line_templates, errors)
+
+        elapsed = time.perf_counter() - started
+        rows_per_second = total / elapsed if elapsed else 0.0
+        _logger.info("Bill import: %d rows, %d bills created, %d errors in %.2fs (%.1f rows/s)",
+                     total, created, len(errors), elapsed, rows_per_second)
+
+        self.write({
+            'state': 'done',
+            'rows_total': total,
+            'rows_created': created,
+            'rows_failed': len(errors),
+            'rows_per_second': rows_per_second,
+            'error_log': '\n'.join(f"Row {row_no}: {message}" for row_no, message in errors),
+        })
+        return {
+            'type': 'ir.actions.act_window',
+            'name': 'Import Meter Readings',
+            'res_model': self._name,
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
+        }
+
+    def _iter_rows(self):
+        """Yield ``(row_no, row)`` pairs from the uploaded file without building a full list."""
+        stream = io.BytesIO(base64.b64decode(self.import_file))
+        text = io.TextIOWrapper(stream, encoding='utf-8-sig')
+        if self.file_format == 'ndjson':
+            for row_no, line in enumerate(text, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError as e:
+                    row = {'__error__': f"Invalid JSON: {e}"}
+                if not isinstance(row, dict):
+                    row = {'__error__': "Each line must be a JSON object."}
+                yield row_no, row
+        else:
+            reader = csv.DictReader(text)
+            missing = [column for column in ('meter_id', 'next_reading') if column not in (reader.fieldnames or [])]
+            if missing:
+                raise UserError(f"Missing required column(s): {', '.join(missing)}")
+            # Row 1 is the header line
+            for row_no, row in enumerate(reader, start=2):
+                yield row_no, row
+
+    def _import_batch(self, batch, line_templates, errors):
+        """Validate a batch of rows and create their bills, returning the number created."""
+        meter_ids = {str(row.get('meter_id') or '').strip() for _row_no, row in batch}
+        partners = self.env['res.partner'].search_read(
+            [('meter_id', 'in', list(meter_ids))], ['meter_id', 'reference_no'])
+        partner_by_meter = {partner['meter_id']: partner for partner in partners}
+
+        bill_model = self.env['account.move']
+        row_nos = []
+        vals_list = []
+        for row_no, row in batch:
+            try:
+                vals_list.append(self._prepare_row_vals(row, partner_by_meter, line_templates))
+                row_nos.append(row_no)
+            except (ValueError, UserError) as e:
+                errors.append((row_no, str(e)))
+
+        if not vals_list:
+            return 0
+        try:
+            with self.env.cr.savepoint():
+                bill_model._create_electric_bills(vals_list)
+            return len(vals_list)
+        except Exception:
+            _logger.info("Bill import: batch create failed, retrying %d rows one by one", len(vals_list))
+
+        # Retry row by row so a single bad row does not reject the whole batch
+        created = 0
+        for row_no, vals in zip(row_nos, vals_list):
+            try:
+                with self.env.cr.savepoint():
+                    bill_model._create_electric_bills([vals])
+                created += 1
+            except Exception as e:
+                errors.append((row_no, str(e)))
+        return created
+
+    def _prepare_row_vals(self, row, partner_by_meter, line_templates):
+        if row.get('__error__'):
+            raise ValueError(row['__error__'])
+
+        meter_id = str(row.get('meter_id') or '').strip()
+        if not meter_id:
+            raise ValueError("Missing meter_id.")
+        partner = partner_by_meter.get(meter_id)
+        if not partner:
+            raise ValueError(f"No customer found for meter {meter_id}.")
+
+        reference_no = str(row.get('reference_no') or '').strip()
+        if reference_no and reference_no != (partner['reference_no'] or ''):
+            raise ValueError(f"Reference number {reference_no} does not match meter {meter_id}.")
+
+        try:
+            next_reading = float(row.get('next_reading'))
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid next_reading: {row.get('next_reading')!r}.")
+
+        dates = {}
+        for column in DATE_COLUMNS:
+            value = str(row.get(column) or '').strip()
+            try:
+                dates[column] = fields.Date.from_string(value) if value else False
+            except ValueError:
+                raise ValueError(f"Invalid {column}: {value!r}, expected YYYY-MM-DD.")
+
+        return self.env['account.move']._prepare_electric_bill_vals(
+            partner['id'], next_reading, line_templates,
+            billing_month=dates['billing_month'],
+            reading_date=dates['reading_date'],
+            issue_date=dates['issue_date'],
+            invoice_date_due=dates['due_date'],
+        )
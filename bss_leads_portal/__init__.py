@@ -1 +1 @@
-from . import models , controller
\ No newline at end of file
+from . import models , controller, wizard
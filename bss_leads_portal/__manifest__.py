@@ -10,6 +10,12 @@
     'application': True,
     "license": "LGPL-3",
     'data': [
+        'security/ir.model.access.csv',
+        'data/crm_lead_daily_stat_data.xml',
+        'data/crm_lead_intake_data.xml',
+        'wizard/crm_lead_import_wizard_views.xml',
+        'views/crm_lead_daily_stat_views.xml',
+        'views/crm_lead_intake_views.xml',
         'views/lead_generation_controller_view.xml',
         'views/dealer_dashboard_portal.xml',
 
@@ -1,101 +1,302 @@
-from odoo import http, fields
+from odoo import api, http, fields
 from odoo.http import request
+from odoo.tools import html2plaintext
+from datetime import datetime
+from urllib.parse import urlencode
+from werkzeug.wsgi import wrap_file
+import csv
+import io
 import logging
+import os
+import tempfile
+import xlsxwriter
+
+from ..models.leads_dashboard_cache import get_leads_dashboard_version, leads_dashboard_cache
 
 _logger = logging.getLogger(__name__)
 
+LEADS_PAGE_SIZE = 50
+LEAD_DESCRIPTION_LENGTH = 50
+LEAD_LIST_FIELDS = ['name', 'description', 'expected_revenue', 'type', 'partner_id', 'stage_id', 'create_date']
+# Contact avatars are served small and cached by browsers; contacts without an image share one placeholder
+AVATAR_MAX_AGE = 7 * 24 * 60 * 60
+AVATAR_PLACEHOLDER = 'base/static/img/avatar_grey.png'
+# Leads read per query by the export, whatever the size of the filtered set
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_COLUMNS = [
+    ('create_date', 'Created On'),
+    ('name', 'Opportunity'),
+    ('type', 'Type'),
+    ('contact_name', 'Contact'),
+    ('partner_id', 'Customer'),
+    ('email_from', 'Email'),
+    ('phone', 'Phone'),
+    ('user_id', 'Salesperson'),
+    ('stage_id', 'Stage'),
+    ('medium_id', 'Medium'),
+    ('expected_revenue', 'Expected Revenue'),
+]
+
+
+def lead_avatar_url(partner_id, checksum=None):
+    """URL of a contact avatar served by :meth:`AdminDashboard.lead_avatar`, the placeholder without an image."""
+    if not partner_id or not checksum:
+        return f'/{AVATAR_PLACEHOLDER}'
+    return f'/admin/leads/avatar/{partner_id}?' + urlencode({'unique': checksum})
+
+
+def export_value(value):
+    """Spreadsheet value of a ``search_read`` value: the name of many2ones, blank for empty fields."""
+    if isinstance(value, tuple):
+        return value[1]
+    return '' if value is False or value is None else value
+
 
 class AdminDashboard(http.Controller):
 
     @http.route('/admin/leads/dashboard', type='http', auth="user", website=True, csrf=False, methods=['GET'])
     def leads_dashboard(self, **kwargs):
         try:
-            # Get all users for the dropdown
-            res_users = request.env['res.users'].sudo().search_read([], ['id', 'name'])
+            domain = self._get_leads_domain(kwargs)
+            _logger.info("Search domain: %s", domain)
+
+            # Invalid filters are already dropped from the domain, so it is the normalized key
+            cache_key = (request.env.cr.dbname, tuple(request.env.user.groups_id.ids), tuple(domain))
+            version = get_leads_dashboard_version(request.env.cr)
+            data = leads_dashboard_cache.get(cache_key, version)
+            if data is None:
+                data = {
+                    # Get all users for the dropdown
+                    'res_users': request.env['res.users'].sudo().search_read([], ['id', 'name']),
+                    # Totals come from one grouped query, the table only from its first page
+                    'kpis': self._get_leads_kpis(domain),
+                    'page': self._get_leads_page(domain),
+                }
+                leads_dashboard_cache.put(cache_key, version, data)
+
+            return request.render('bss_leads_portal.crm_leads_admin_dashboard_id', {
+                'res_users': data['res_users'],
+                'leads_opportunity_list': data['page']['records'],
+                'next_cursor': data['page']['next_cursor'],
+                'kpis': data['kpis'],
+                'kwargs': kwargs,
+            })
+
+        except Exception as e:
+            _logger.error("Dashboard error: %s", str(e))
+            return request.render('bss_leads_portal.crm_leads_admin_dashboard_id', {
+                'res_users': [],
+                'leads_opportunity_list': [],
+                'next_cursor': None,
+                'kpis': self._get_empty_kpis(),
+                'kwargs': kwargs,
+                'error_message': str(e),
+            })
 
-            # Build domain based on filters
-            domain = []
+    @http.route('/admin/leads/dashboard/data', type='http', auth="user", methods=['GET'])
+    def leads_dashboard_data(self, cursor=None, **kwargs):
+        """Next page of the dashboard table, for infinite scroll."""
+        domain = self._get_leads_domain(kwargs)
+        return request.make_json_response(self._get_leads_page(domain, cursor))
 
-            start_date = kwargs.get('start_date')
-            end_date = kwargs.get('end_date')
-            sales_person = kwargs.get('sales_person')
-            lead_type = kwargs.get('type')
+    @http.route('/admin/leads/dashboard/trend', type='http', auth="user", methods=['GET'])
+    def leads_dashboard_trend(self, interval='day', **kwargs):
+        """Leads and expected revenue per day, week or month for the dashboard filters."""
+        if interval not in ('day', 'week', 'month'):
+            return request.not_found()
+        stats_domain = self._get_stats_domain(self._get_leads_domain(kwargs))
+        return request.make_json_response(
+            request.env['crm.lead.daily.stat'].sudo()._get_trend(stats_domain, interval))
 
-            # Debug logging
-            _logger.info("Filter parameters: %s", kwargs)
+    @http.route('/admin/leads/dashboard/cache/stats', type='http', auth="user", methods=['GET'])
+    def leads_dashboard_cache_stats(self, **kw):
+        if not request.env.user.has_group('base.group_system'):
+            return request.not_found()
+        return request.make_json_response(leads_dashboard_cache.stats())
 
-            # Add date filters
-            if start_date:
-                try:
-                    domain.append(('create_date', '>=', start_date + ' 00:00:00'))
-                except:
-                    pass
+    @http.route('/admin/leads/dashboard/export', type='http', auth="user", methods=['GET'])
+    def leads_dashboard_export(self, file_format='csv', **kwargs):
+        """Download every lead matching the dashboard filters as CSV or XLSX.
 
-            if end_date:
-                try:
-                    domain.append(('create_date', '<=', end_date + ' 23:59:59'))
-                except:
-                    pass
+        CSV is streamed while it is read, chunk by chunk, from a cursor of its
+        own; XLSX is written row by row to a temporary file and sent from disk.
+        """
+        if file_format not in ('csv', 'xlsx') or not request.env.user.has_group('sales_team.group_sale_salesman'):
+            return request.not_found()
+        domain = self._get_leads_domain(kwargs)
+        filename = f"leads_{fields.Date.to_string(fields.Date.context_today(request.env.user))}.{file_format}"
+        if file_format == 'csv':
+            registry, uid, context = request.env.registry, request.env.uid, dict(request.env.context)
+            return request.make_response(self._iter_export_csv(registry, uid, context, domain), headers=[
+                ('Content-Type', 'text/csv; charset=utf-8'),
+                ('Content-Disposition', http.content_disposition(filename)),
+            ])
 
-            # Add salesperson filter
-            if sales_person:
+        # xlsxwriter only flushes rows to disk in constant_memory mode
+        fd, path = tempfile.mkstemp(suffix='.xlsx')
+        os.close(fd)
+        try:
+            workbook = xlsxwriter.Workbook(path, {'constant_memory': True, 'in_memory': False,
+                                                  'default_date_format': 'yyyy-mm-dd hh:mm:ss'})
+            sheet = workbook.add_worksheet('Leads')
+            sheet.write_row(0, 0, [label for _name, label in EXPORT_COLUMNS])
+            for row_index, row in enumerate(self._iter_export_rows(request.env, domain), start=1):
+                sheet.write_row(row_index, 0, row)
+            workbook.close()
+            # The open file outlives its name, so nothing is left behind in the temp directory
+            export_file = open(path, 'rb')
+        finally:
+            os.unlink(path)
+        size = os.fstat(export_file.fileno()).st_size
+        return request.make_response(wrap_file(request.httprequest.environ, export_file), headers=[
+            ('Content-Type', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+            ('Content-Disposition', http.content_disposition(filename)),
+            ('Content-Length', str(size)),
+        ])
+
+    def _iter_export_csv(self, registry, uid, context, domain):
+        # Runs while the response is sent, after the request's cursor is closed
+        with registry.cursor() as cr:
+            env = api.Environment(cr, uid, context)
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow([label for _name, label in EXPORT_COLUMNS])
+            for index, row in enumerate(self._iter_export_rows(env, domain), start=1):
+                writer.writerow(row)
+                if index % EXPORT_CHUNK_SIZE == 0:
+                    yield buffer.getvalue().encode()
+                    buffer.seek(0)
+                    buffer.truncate()
+            yield buffer.getvalue().encode()
+
+    def _iter_export_rows(self, env, domain):
+        """Yield one list of values per lead readable by the user, newest first, reading them in keyset chunks."""
+        leads_model = env['crm.lead']
+        field_names = [name for name, _label in EXPORT_COLUMNS]
+        keyset = []
+        while True:
+            leads = leads_model.search_read(domain + keyset, field_names, order='create_date desc, id desc',
+                                            limit=EXPORT_CHUNK_SIZE)
+            for lead in leads:
+                yield [export_value(lead[name]) for name in field_names]
+            if len(leads) < EXPORT_CHUNK_SIZE:
+                break
+            last = leads[-1]
+            keyset = ['|', ('create_date', '<', last['create_date']),
+                      '&', ('create_date', '=', last['create_date']), ('id', '<', last['id'])]
+            # Drop the chunk from the ORM cache so memory stays bounded
+            env.invalidate_all()
+
+    @http.route('/admin/leads/avatar/<int:partner_id>', type='http', auth="user", methods=['GET'])
+    def lead_avatar(self, partner_id, **kw):
+        """Stream a contact's 128px image with ETag and cache headers."""
+        partner = request.env['res.partner'].browse(partner_id)
+        if not partner.exists() or not partner.has_access('read'):
+            return request.not_found()
+        stream = request.env['ir.binary']._get_image_stream_from(partner, 'image_128', placeholder=AVATAR_PLACEHOLDER)
+        return stream.get_response(max_age=AVATAR_MAX_AGE, immutable=bool(kw.get('unique')))
+
+    def _get_leads_domain(self, kwargs):
+        """Build the crm.lead domain from the dashboard filter parameters, ignoring invalid ones."""
+        domain = []
+
+        start_date = kwargs.get('start_date')
+        end_date = kwargs.get('end_date')
+        sales_person = kwargs.get('sales_person')
+        lead_type = kwargs.get('type')
+
+        # Add date filters
+        for value, operator, time in ((start_date, '>=', '00:00:00'), (end_date, '<=', '23:59:59')):
+            if value:
                 try:
-                    domain.append(('user_id', '=', int(sales_person)))
+                    fields.Date.from_string(value)
+                    domain.append(('create_date', operator, f'{value} {time}'))
                 except ValueError:
                     pass
 
-            # Add type filter
-            if lead_type in ['lead', 'opportunity']:
-                domain.append(('type', '=', lead_type))
+        # Add salesperson filter
+        if sales_person:
+            try:
+                domain.append(('user_id', '=', int(sales_person)))
+            except ValueError:
+                pass
 
-            _logger.info("Search domain: %s", domain)
+        # Add type filter
+        if lead_type in ['lead', 'opportunity']:
+            domain.append(('type', '=', lead_type))
 
-            # Search for leads/opportunities
-            leads = request.env['crm.lead'].sudo().search(domain, order='create_date desc')
+        return domain
 
-            _logger.info("Found %d records", len(leads))
+    def _get_empty_kpis(self):
+        return {'lead_count': 0, 'opportunity_count': 0, 'expected_revenue': 0.0, 'total_count': 0}
 
-            # Process data
-            lead_data = []
-            for lead in leads:
-                try:
-                    # Handle partner image safely
-                    image_data = None
-                    if lead.partner_id and lead.partner_id.image_1920:
-                        try:
-                            if isinstance(lead.partner_id.image_1920, bytes):
-                                image_data = lead.partner_id.image_1920.decode('utf-8')
-                            else:
-                                image_data = str(lead.partner_id.image_1920)
-                        except:
-                            image_data = None
-
-                    lead_data.append({
-                        'id': lead.id,
-                        'name': lead.name or 'N/A',
-                        'description': lead.description or 'No description',
-                        'expected_revenue': lead.expected_revenue or 0.0,
-                        'type': lead.type,
-                        'partner_name': lead.partner_id.name if lead.partner_id else 'No Contact',
-                        'image': image_data,
-                        'stage': lead.stage_id.name if lead.stage_id else 'New',
-                        'create_date': lead.create_date,
-                    })
-                except Exception as e:
-                    _logger.error("Error processing lead %s: %s", lead.id, str(e))
-                    continue
+    def _get_stats_domain(self, domain):
+        """Translate a dashboard lead domain to the daily statistics, whose dates are whole days."""
+        stats_domain = []
+        for field_name, operator, value in domain:
+            if field_name == 'create_date':
+                stats_domain.append(('day', operator, value.split(' ')[0]))
+            else:
+                stats_domain.append((field_name, operator, value))
+        return stats_domain
 
-            return request.render('bss_leads_portal.crm_leads_admin_dashboard_id', {
-                'res_users': res_users,
-                'leads_opportunity_list': lead_data,
-                'kwargs': kwargs,
-            })
+    def _get_leads_kpis(self, domain):
+        # Read from the daily rollup: the cost follows the days in range, not the leads
+        return request.env['crm.lead.daily.stat'].sudo()._get_kpis(self._get_stats_domain(domain))
 
-        except Exception as e:
-            _logger.error("Dashboard error: %s", str(e))
-            return request.render('bss_leads_portal.crm_leads_admin_dashboard_id', {
-                'res_users': [],
-                'leads_opportunity_list': [],
-                'kwargs': kwargs,
-                'error_message': str(e),
+    def _get_leads_page(self, domain, cursor=None):
+        """Return ``{'records': [...], 'next_cursor': str|None}`` for the page after ``cursor``.
+
+        Pages are ordered newest first on (create_date, id); the cursor is the
+        create_date, in ISO format with microseconds, and id of the last record
+        of the previous page.
+        """
+        keyset = []
+        if cursor:
+            try:
+                after_date, after_id = cursor.rsplit(',', 1)
+                # Full precision: leads created in one transaction share their second
+                after_date, after_id = datetime.fromisoformat(after_date), int(after_id)
+                keyset = ['|', ('create_date', '<', after_date),
+                          '&', ('create_date', '=', after_date), ('id', '<', after_id)]
+            except ValueError:
+                return {'records': [], 'next_cursor': None}
+
+        leads = request.env['crm.lead'].sudo().search_read(
+            domain + keyset, LEAD_LIST_FIELDS, order='create_date desc, id desc', limit=LEADS_PAGE_SIZE + 1)
+        has_more = len(leads) > LEADS_PAGE_SIZE
+        leads = leads[:LEADS_PAGE_SIZE]
+
+        # Only the checksums of the avatars are read, the images themselves go through lead_avatar
+        partner_ids = {lead['partner_id'][0] for lead in leads if lead['partner_id']}
+        checksums = {
+            attachment['res_id']: attachment['checksum']
+            for attachment in request.env['ir.attachment'].sudo().search_read([
+                ('res_model', '=', 'res.partner'),
+                ('res_field', '=', 'image_128'),
+                ('res_id', 'in', list(partner_ids)),
+            ], ['res_id', 'checksum'])
+        } if partner_ids else {}
+
+        records = []
+        for lead in leads:
+            description = html2plaintext(lead['description'] or '') or 'No description'
+            partner_id = lead['partner_id'] and lead['partner_id'][0]
+            records.append({
+                'id': lead['id'],
+                'name': lead['name'] or 'N/A',
+                'description': description[:LEAD_DESCRIPTION_LENGTH],
+                'description_truncated': len(description) > LEAD_DESCRIPTION_LENGTH,
+                'expected_revenue': lead['expected_revenue'] or 0.0,
+                'type': lead['type'],
+                'partner_name': lead['partner_id'][1] if lead['partner_id'] else 'No Contact',
+                'avatar_url': lead_avatar_url(partner_id, checksums.get(partner_id)),
+                'stage': lead['stage_id'][1] if lead['stage_id'] else 'New',
+                'create_date': fields.Datetime.to_string(lead['create_date']),
             })
+
+        next_cursor = None
+        if has_more:
+            last = leads[-1]
+            next_cursor = f"{last['create_date'].isoformat()},{last['id']}"
+        return {'records': records, 'next_cursor': next_cursor}
@@ -1,71 +1,37 @@
 import json
 import werkzeug.wrappers
+from urllib.parse import urlencode
 from odoo import http
+from odoo.exceptions import UserError
 from odoo.http import request
+from ..wizard.crm_lead_import_wizard import iter_lead_rows
+
+# Leads created per create() call by the bulk import endpoint
+LEAD_IMPORT_BATCH_SIZE = 500
+
+
 class LeadsGenerationController(http.Controller):
     @http.route('/web/leads/generate', type='http', auth='user', website=True, csrf=True, methods=['GET', 'POST'])
     def generate_leads(self, **kwargs):
-        medium_list = []
-        medium_recs = request.env['utm.medium'].sudo().search([])
-        for rec in medium_recs:
-            medium_list.append({'id': rec.id, 'name': rec.name})
-
         if request.httprequest.method == 'POST':
-            contact_name = kwargs.get('contact_name')
-            contact_phone = kwargs.get('contact_phone')
-            contact_email = kwargs.get('contact_email')
-            contact_opportunity = kwargs.get('contact_opportunity')
-            description = kwargs.get('description')
-            medium_id = kwargs.get('medium_id')
-            website = kwargs.get('website')
-            tags = kwargs.get('tags')
-            split_tags = []
-
-            if isinstance(tags, str):
-                tag_list = [tag.strip() for tag in tags.split(',') if tag.strip()]
-                tag_model = request.env['crm.tag'].sudo()
-
-                for tag_name in tag_list:
-                    tag = tag_model.search([('name', '=', tag_name)], limit=1)
-                    if not tag:
-                        tag = tag_model.create({'name': tag_name})
-                    split_tags.append(tag.id)
-
-            partner = request.env['res.partner'].sudo().search([
-                ('name', '=', contact_name),
-                ('phone', '=', contact_phone),
-                ('email', '=', contact_email)
-            ], limit=1)
-            print(f'Partner {partner.name} ---> Found') if partner else None
-
-            if not partner:
-                partner = request.env['res.partner'].sudo().create({
-                    'name': contact_name,
-                    'phone': contact_phone,
-                    'email': contact_email,
-                })
-                print(f'Partner {partner.name} ---> Created')
-
-            # Step 3: Create Lead
-            lead_vals = {
-                'partner_id': partner.id,
-                'email_from': partner.email,
-                'phone': partner.phone,
-                'name': contact_opportunity,
-                'description': description,
-                'medium_id': int(medium_id),
-                'website': website,
-                'type': 'lead',
-                'tag_ids': [(6, 0, split_tags)],
-            }
-
-            lead = request.env['crm.lead'].sudo().create(lead_vals)
-            print(f'Lead Created: {lead.id} for Partner: {partner.id}')
+            # Queue the submission, the lead is created in the background by the intake cron
+            status = request.env['crm.lead.intake']._submit(kwargs, request.httprequest.remote_addr)
+            if status == 'rate_limited':
+                return request.make_response('Too many submissions, please try again in a minute.',
+                                             headers=[('Retry-After', '60')], status=429)
 
             # Redirect with success parameters
-            return request.redirect(f'/web/leads/generate?success=true&lead_name={lead.name}&partner_name={partner.name}')
+            return request.redirect('/web/leads/generate?' + urlencode({
+                'success': 'true',
+                'lead_name': kwargs.get('contact_opportunity') or '',
+                'partner_name': kwargs.get('contact_name') or '',
+            }))
 
         # Handle GET requests, including success case from redirect
+        medium_list = []
+        medium_recs = request.env['utm.medium'].sudo().search([])
+        for rec in medium_recs:
+            medium_list.append({'id': rec.id, 'name': rec.name})
         success = request.httprequest.args.get('success') == 'true'
         lead_name = request.httprequest.args.get('lead_name', '')
         partner_name = request.httprequest.args.get('partner_name', '')
@@ -76,4 +42,23 @@ class LeadsGenerationController(http.Controller):
             'partner_name': partner_name
         })
 
+    @http.route('/web/leads/import', type='http', auth='user', methods=['POST'], csrf=False)
+    def import_leads(self, **kwargs):
+        """Bulk lead import: a CSV (text/csv) or NDJSON body with the lead form's field names.
+
+        The body is read line by line and imported in batches; the response
+        lists the per-row errors and the import rate.
+        """
+        if not request.env.user.has_group('sales_team.group_sale_salesman'):
+            return request.not_found()
+        file_format = 'csv' if request.httprequest.mimetype == 'text/csv' else 'ndjson'
+        stream = request.httprequest.stream
+        lines = (line.decode('utf-8-sig') for line in iter(stream.readline, b''))
+        try:
+            stats = request.env['crm.lead'].sudo()._import_web_form_stream(
+                iter_lead_rows(lines, file_format), LEAD_IMPORT_BATCH_SIZE)
+        except UserError as e:
+            return request.make_json_response({'error': str(e)}, status=400)
+        stats['errors'] = [{'row': row_no, 'error': error} for row_no, error in stats['errors']]
+        return request.make_json_response(stats)
 
@@ -0,0 +1,6 @@
+from . import crm_lead_daily_stat
+from . import crm_lead
+from . import crm_lead_intake
+from . import crm_tag
+from . import res_partner
+from . import res_users
@@ -0,0 +1,206 @@
+import logging
+import time
+
+from odoo import api, models
+from odoo.tools.sql import create_index
+
+from .crm_lead_daily_stat import LEAD_STAT_FIELDS
+from .leads_dashboard_cache import create_leads_dashboard_version, invalidate_leads_dashboard_cache
+
+_logger = logging.getLogger(__name__)
+
+
+class CrmLead(models.Model):
+    _inherit = 'crm.lead'
+
+    def init(self):
+        super().init()
+        # The leads dashboard pages through leads newest first on (create_date, id)
+        create_index(self.env.cr, 'crm_lead_create_date_id_index', self._table, ['create_date DESC', 'id DESC'])
+        create_leads_dashboard_version(self.env.cr)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        invalidate_leads_dashboard_cache(self.env)
+        leads = super().create(vals_list)
+        leads.flush_recordset(LEAD_STAT_FIELDS)
+        self.env['crm.lead.daily.stat'].sudo()._apply_leads(leads, 1)
+        return leads
+
+    def write(self, vals):
+        invalidate_leads_dashboard_cache(self.env)
+        if set(vals).isdisjoint(LEAD_STAT_FIELDS):
+            return super().write(vals)
+        # Move the leads out of the rollup with their old values and back in with the new ones
+        stats = self.env['crm.lead.daily.stat'].sudo()
+        self.flush_recordset(LEAD_STAT_FIELDS)
+        stats._apply_leads(self, -1)
+        res = super().write(vals)
+        self.flush_recordset(LEAD_STAT_FIELDS)
+        stats._apply_leads(self, 1)
+        return res
+
+    def unlink(self):
+        invalidate_leads_dashboard_cache(self.env)
+        self.flush_recordset(LEAD_STAT_FIELDS)
+        self.env['crm.lead.daily.stat'].sudo()._apply_leads(self, -1)
+        return super().unlink()
+
+
+    @api.model
+    def _create_web_form_leads(self, rows, cache=None):
+        """Create leads from lead form submissions or imported rows, with the rules of the web form.
+
+        Each row holds the form fields: ``contact_name``, ``contact_phone``,
+        ``contact_email``, ``contact_opportunity``, ``description``, ``website``,
+        ``tags`` (comma separated) and ``medium_id`` or a ``medium`` name.
+        Contacts are matched or created, tags resolved or created and every
+        valid row's lead created in one batch. ``cache`` holds the tag, medium
+        and contact lookups and can be shared between batches.
+
+        Returns one ``(lead, error)`` pair per row, in order.
+        """
+        cache = cache if cache is not None else {}
+        results = [(self.browse(), None)] * len(rows)
+        prepared = []
+        for index, row in enumerate(rows):
+            try:
+                prepared.append((index, self._parse_web_form_row(row, cache)))
+            except ValueError as e:
+                results[index] = (self.browse(), str(e))
+        if not prepared:
+            return results
+
+        # One search (and at most one create) for all the tags of the batch
+        tag_cache = cache.setdefault('tags', {})
+        tag_names = {name for _index, parsed in prepared for name in parsed['tags']}
+        missing = [name for name in tag_names if name not in tag_cache]
+        if missing:
+            tags = self.env['crm.tag']._get_or_create_by_names(missing)
+            tag_cache.update(zip(missing, tags.ids))
+
+        partner_ids = self.env['res.partner']._find_or_create_contacts(
+            [(parsed['contact_name'], parsed['contact_phone'], parsed['contact_email']) for _index, parsed in prepared],
+            cache.setdefault('partners', {}))
+
+        vals_list = []
+        for (_index, parsed), partner_id in zip(prepared, partner_ids):
+            vals_list.append({
+                'partner_id': partner_id,
+                'email_from': parsed['contact_email'],
+                'phone': parsed['contact_phone'],
+                'name': parsed['contact_opportunity'],
+                'description': parsed['description'],
+                'medium_id': parsed['medium_id'],
+                'website': parsed['website'],
+                'type': 'lead',
+                'tag_ids': [(6, 0, [tag_cache[name] for name in parsed['tags']])],
+            })
+        leads = self.create(vals_list)
+        for (index, _parsed), lead in zip(prepared, leads):
+            results[index] = (lead, None)
+        return results
+
+    @api.model
+    def _parse_web_form_row(self, row, cache):
+        if row.get('__error__'):
+            raise ValueError(row['__error__'])
+
+        def value(name):
+            return str(row.get(name) or '').strip()
+
+        if not value('contact_opportunity'):
+            raise ValueError("Missing contact_opportunity.")
+        if not value('contact_name'):
+            raise ValueError("Missing contact_name.")
+
+        mediums = cache.get('mediums')
+        if mediums is None:
+            # utm.medium is a short list, load it once per import
+            mediums = cache['mediums'] = {'ids': set(), 'names': {}}
+            for medium in self.env['utm.medium'].search_read([], ['name']):
+                mediums['ids'].add(medium['id'])
+                mediums['names'][medium['name'].lower()] = medium['id']
+        medium_id = False
+        if value('medium_id'):
+            if not value('medium_id').isdigit() or int(value('medium_id')) not in mediums['ids']:
+                raise ValueError(f"Unknown medium_id {value('medium_id')!r}.")
+            medium_id = int(value('medium_id'))
+        elif value('medium'):
+            medium_id = mediums['names'].get(value('medium').lower())
+            if not medium_id:
+                raise ValueError(f"Unknown medium {value('medium')!r}.")
+
+        return {
+            'contact_name': value('contact_name'),
+            'contact_phone': value('contact_phone') or False,
+            'contact_email': value('contact_email') or False,
+            'contact_opportunity': value('contact_opportunity'),
+            'description': value('description') or False,
+            'website': value('website') or False,
+            'medium_id': medium_id,
+            'tags': list(dict.fromkeys(tag.strip() for tag in value('tags').split(',') if tag.strip())),
+        }
+
+    @api.model
+    def _import_web_form_rows(self, numbered_rows, cache):
+        """Import a batch of ``(row_no, row)`` pairs, returning ``(created, [(row_no, error), ...])``.
+
+        When the batch fails as a whole, its rows are retried one by one so
+        that a single bad row does not reject the others.
+        """
+        rows = [row for _row_no, row in numbered_rows]
+        try:
+            with self.env.cr.savepoint():
+                results = self._create_web_form_leads(rows, cache)
+        except Exception:
+            _logger.info("Lead import: batch create failed, retrying %d rows one by one", len(rows))
+            # Ids cached during the failed batch were rolled back with it
+            cache.clear()
+            results = []
+            for row in rows:
+                try:
+                    with self.env.cr.savepoint():
+                        results.extend(self._create_web_form_leads([row], cache))
+                except Exception as e:
+                    cache.clear()
+                    results.append((self.browse(), str(e)))
+
+        errors = [(row_no, error) for (row_no, _row), (_lead, error) in zip(numbered_rows, results) if error]
+        return len(rows) - len(errors), errors
+
+    @api.model
+    def _import_web_form_stream(self, numbered_rows, batch_size):
+        """Import ``(row_no, row)`` pairs in batches of ``batch_size`` without holding them all.
+
+        Returns the row counts, the rows per second and the ``(row_no, error)`` list.
+        """
+        started = time.perf_counter()
+        cache = {}
+        total = created = 0
+        errors = []
+        batch = []
+        for numbered_row in numbered_rows:
+            total += 1
+            batch.append(numbered_row)
+            if len(batch) >= batch_size:
+                batch_created, batch_errors = self._import_web_form_rows(batch, cache)
+                created += batch_created
+                errors += batch_errors
+                batch = []
+        if batch:
+            batch_created, batch_errors = self._import_web_form_rows(batch, cache)
+            created += batch_created
+            errors += batch_errors
+
+        elapsed = time.perf_counter() - started
+        rows_per_second = total / elapsed if elapsed else 0.0
+        _logger.info("Lead import: %d rows, %d leads created, %d errors in %.2fs (%.1f rows/s)",
+                     total, created, len(errors), elapsed, rows_per_second)
+        return {
+            'rows_total': total,
+            'rows_created': created,
+            'rows_failed': len(errors),
+            'rows_per_second': rows_per_second,
+            'errors': errors,
+        }
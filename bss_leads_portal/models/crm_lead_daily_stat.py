@@ -0,0 +1,108 @@
+import logging
+import time
+
+from odoo import api, fields, models
+from odoo.tools.sql import create_unique_index
+
+_logger = logging.getLogger(__name__)
+
+# Lead fields the rollup is keyed on or sums. team_id is included because
+# changing it recomputes stage_id without going through write().
+LEAD_STAT_FIELDS = ('create_date', 'user_id', 'type', 'stage_id', 'medium_id', 'expected_revenue', 'active',
+                    'team_id')
+
+# Expressions of the unique index the upserts resolve their conflicts on
+STAT_KEY = "day, COALESCE(user_id, 0), COALESCE(type, ''), COALESCE(stage_id, 0), COALESCE(medium_id, 0)"
+
+
+class CrmLeadDailyStat(models.Model):
+    _name = 'crm.lead.daily.stat'
+    _description = 'Daily Lead Statistics'
+    _order = 'day desc'
+    _rec_name = 'day'
+
+    day = fields.Date(string='Day', required=True, readonly=True, index=True)
+    user_id = fields.Many2one('res.users', string='Salesperson', readonly=True, ondelete='set null')
+    type = fields.Selection([('lead', 'Lead'), ('opportunity', 'Opportunity')], string='Type', readonly=True)
+    stage_id = fields.Many2one('crm.stage', string='Stage', readonly=True, ondelete='set null')
+    medium_id = fields.Many2one('utm.medium', string='Medium', readonly=True, ondelete='set null')
+    lead_count = fields.Integer(string='Leads', readonly=True, aggregator='sum')
+    expected_revenue = fields.Float(string='Expected Revenue', readonly=True, aggregator='sum')
+
+    def init(self):
+        super().init()
+        create_unique_index(self.env.cr, 'crm_lead_daily_stat_key_index', self._table, [STAT_KEY])
+
+    @api.model
+    def _apply_leads(self, leads, sign):
+        """Add (``sign=1``) or remove (``sign=-1``) the contribution of active ``leads`` to their days.
+
+        The leads are read from the database, so pending changes must be flushed first.
+        """
+        if not leads:
+            return
+        self.env.cr.execute(f"""
+            INSERT INTO crm_lead_daily_stat AS stat (day, user_id, type, stage_id, medium_id,
+                                                     lead_count, expected_revenue,
+                                                     create_uid, create_date, write_uid, write_date)
+            SELECT lead.create_date::date, lead.user_id, lead.type, lead.stage_id, lead.medium_id,
+                   %(sign)s * COUNT(*), %(sign)s * SUM(COALESCE(lead.expected_revenue, 0)),
+                   %(uid)s, NOW() AT TIME ZONE 'UTC', %(uid)s, NOW() AT TIME ZONE 'UTC'
+              FROM crm_lead lead
+             WHERE lead.id IN %(ids)s
+               AND lead.active IS TRUE
+          GROUP BY 1, 2, 3, 4, 5
+                ON CONFLICT ({STAT_KEY}) DO UPDATE
+               SET lead_count = stat.lead_count + EXCLUDED.lead_count,
+                   expected_revenue = stat.expected_revenue + EXCLUDED.expected_revenue,
+                   write_uid = EXCLUDED.write_uid,
+                   write_date = EXCLUDED.write_date
+         RETURNING stat.day
+        """, {'sign': sign, 'uid': self.env.uid, 'ids': tuple(leads.ids)})
+        days = list({day for day, in self.env.cr.fetchall()})
+        if sign < 0 and days:
+            self.env.cr.execute("DELETE FROM crm_lead_daily_stat WHERE day = ANY(%s) AND lead_count <= 0", [days])
+        self.invalidate_model()
+
+    @api.model
+    def _rebuild(self):
+        """Recompute the whole rollup from crm_lead, e.g. to backfill it after install."""
+        started = time.perf_counter()
+        self.env['crm.lead'].flush_model(LEAD_STAT_FIELDS)
+        self.env.cr.execute("DELETE FROM crm_lead_daily_stat")
+        self.env.cr.execute("""
+            INSERT INTO crm_lead_daily_stat (day, user_id, type, stage_id, medium_id,
+                                             lead_count, expected_revenue,
+                                             create_uid, create_date, write_uid, write_date)
+            SELECT create_date::date, user_id, type, stage_id, medium_id,
+                   COUNT(*), SUM(COALESCE(expected_revenue, 0)),
+                   %(uid)s, NOW() AT TIME ZONE 'UTC', %(uid)s, NOW() AT TIME ZONE 'UTC'
+              FROM crm_lead
+             WHERE active IS TRUE
+          GROUP BY 1, 2, 3, 4, 5
+        """, {'uid': self.env.uid})
+        _logger.info("Daily lead statistics rebuilt: %d rows in %.2fs", self.env.cr.rowcount,
+                     time.perf_counter() - started)
+        self.invalidate_model()
+
+    @api.model
+    def _get_kpis(self, domain):
+        """Lead and opportunity counts and expected revenue of the days matching ``domain``."""
+        kpis = {'lead_count': 0, 'opportunity_count': 0, 'expected_revenue': 0.0, 'total_count': 0}
+        for lead_type, count, expected_revenue in self._read_group(
+                domain, ['type'], ['lead_count:sum', 'expected_revenue:sum']):
+            if lead_type in ('lead', 'opportunity'):
+                kpis[f'{lead_type}_count'] = count
+            kpis['expected_revenue'] += expected_revenue or 0.0
+            kpis['total_count'] += count
+        return kpis
+
+    @api.model
+    def _get_trend(self, domain, interval='day'):
+        """``[{'day', 'lead_count', 'expected_revenue'}]`` per ``interval``, oldest first."""
+        return [{
+            'day': fields.Date.to_string(day),
+            'lead_count': count,
+            'expected_revenue': expected_revenue,
+        } for day, count, expected_revenue in self._read_group(
+            domain, [f'day:{interval}'], ['lead_count:sum', 'expected_revenue:sum'], order=f'day:{interval}')]
@@ -0,0 +1,122 @@
+import hashlib
+import json
+import logging
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from odoo import api, fields, models
+from odoo.tools.sql import create_index
+
+_logger = logging.getLogger(__name__)
+
+# Form fields kept from a submission, everything else (csrf token, ...) is dropped
+INTAKE_FIELDS = ('contact_name', 'contact_phone', 'contact_email', 'contact_opportunity', 'description',
+                 'medium_id', 'website', 'tags')
+RATE_LIMIT_PARAM = 'bss_leads_portal.lead_intake_rate_limit'
+DEFAULT_RATE_LIMIT = 10
+# Submissions per IP counted over this window, identical ones collapsed over the other
+RATE_LIMIT_WINDOW = timedelta(minutes=1)
+DUPLICATE_WINDOW = timedelta(minutes=10)
+INTAKE_BATCH_SIZE = 200
+INTAKE_CRON_TIME_BUDGET = 50
+INTAKE_RETENTION = timedelta(days=30)
+
+
+class CrmLeadIntake(models.Model):
+    _name = 'crm.lead.intake'
+    _description = 'Lead Form Submission'
+    _order = 'id desc'
+
+    payload = fields.Text(string='Submission', required=True, readonly=True)
+    fingerprint = fields.Char(string='Fingerprint', required=True, readonly=True, index=True)
+    ip_address = fields.Char(string='IP Address', readonly=True)
+    user_id = fields.Many2one('res.users', string='Submitted By', readonly=True, ondelete='set null')
+    state = fields.Selection([
+        ('pending', 'Pending'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ], string='Status', default='pending', required=True, readonly=True, index=True)
+    error = fields.Text(string='Error', readonly=True)
+    date_done = fields.Datetime(string='Processed On', readonly=True)
+
+    def init(self):
+        super().init()
+        # Rate limiting counts the recent submissions of one IP
+        create_index(self.env.cr, 'crm_lead_intake_ip_create_date_index', self._table,
+                     ['ip_address', 'create_date DESC'])
+
+    @api.model
+    def _submit(self, values, ip_address):
+        """Queue a lead form submission, return ``'queued'``, ``'duplicate'`` or ``'rate_limited'``.
+
+        Identical submissions within a few minutes collapse into the first one,
+        and an IP sending more than the configured number per minute is refused.
+        """
+        payload = {name: str(values.get(name) or '').strip() for name in INTAKE_FIELDS}
+        fingerprint = hashlib.sha256(json.dumps(
+            {name: value.lower() for name, value in payload.items()}, sort_keys=True).encode()).hexdigest()
+        now = fields.Datetime.now()
+
+        self.env.cr.execute("""
+            SELECT COUNT(*) FILTER (WHERE ip_address = %(ip)s AND create_date >= %(rate_since)s),
+                   COUNT(*) FILTER (WHERE fingerprint = %(fingerprint)s)
+              FROM crm_lead_intake
+             WHERE (ip_address = %(ip)s AND create_date >= %(rate_since)s)
+                OR (fingerprint = %(fingerprint)s AND create_date >= %(duplicate_since)s)
+        """, {
+            'ip': ip_address,
+            'fingerprint': fingerprint,
+            'rate_since': now - RATE_LIMIT_WINDOW,
+            'duplicate_since': now - DUPLICATE_WINDOW,
+        })
+        recent_from_ip, duplicates = self.env.cr.fetchone()
+        if duplicates:
+            return 'duplicate'
+        rate_limit = int(self.env['ir.config_parameter'].sudo().get_param(RATE_LIMIT_PARAM, DEFAULT_RATE_LIMIT))
+        if ip_address and recent_from_ip >= rate_limit:
+            _logger.info("Lead intake: rate limit reached for %s", ip_address)
+            return 'rate_limited'
+
+        self.sudo().create({
+            'payload': json.dumps(payload),
+            'fingerprint': fingerprint,
+            'ip_address': ip_address,
+            'user_id': self.env.uid,
+        })
+        self.env.ref('bss_leads_portal.ir_cron_drain_lead_intake').sudo()._trigger()
+        return 'queued'
+
+    @api.model
+    def _cron_drain_intake(self):
+        """Turn pending submissions into leads in batches, committing after each batch."""
+        started = time.perf_counter()
+        cache = {}
+        processed = failed = 0
+        while time.perf_counter() - started < INTAKE_CRON_TIME_BUDGET:
+            intakes = self.search([('state', '=', 'pending')], order='id', limit=INTAKE_BATCH_SIZE)
+            if not intakes:
+                break
+            error_by_id = {}
+            # Leads are created as their submitter, like the form did, so defaults such as the salesperson match
+            rows_by_user = defaultdict(list)
+            for intake in intakes:
+                rows_by_user[intake.user_id].append((intake.id, json.loads(intake.payload)))
+            for user, numbered_rows in rows_by_user.items():
+                lead_model = self.env['crm.lead'].with_user(user or self.env.user).sudo()
+                _created, errors = lead_model._import_web_form_rows(numbered_rows, cache)
+                error_by_id.update(errors)
+            now = fields.Datetime.now()
+            failed_intakes = intakes.filtered(lambda intake: intake.id in error_by_id)
+            (intakes - failed_intakes).write({'state': 'done', 'date_done': now})
+            for intake in failed_intakes:
+                intake.write({'state': 'failed', 'error': error_by_id[intake.id], 'date_done': now})
+            processed += len(intakes)
+            failed += len(failed_intakes)
+            self.env.cr.commit()
+
+        # Keep the table small: processed submissions are only needed for a while
+        self.search([('state', '!=', 'pending'),
+                     ('date_done', '<', fields.Datetime.now() - INTAKE_RETENTION)]).unlink()
+        _logger.info("Lead intake: %d submission(s) processed, %d failed in %.2fs",
+                     processed, failed, time.perf_counter() - started)
@@ -0,0 +1,17 @@
+from odoo import api, models
+
+
+class CrmTag(models.Model):
+    _inherit = 'crm.tag'
+
+    @api.model
+    def _get_or_create_by_names(self, names):
+        """Return the tags named ``names``, in order, creating the missing ones in one batch."""
+        names = list(dict.fromkeys(name for name in names if name))
+        if not names:
+            return self.browse()
+        tags = {tag.name: tag for tag in self.search([('name', 'in', names)])}
+        missing = [name for name in names if name not in tags]
+        if missing:
+            tags.update(zip(missing, self.create([{'name': name} for name in missing])))
+        return self.browse([tags[name].id for name in names])
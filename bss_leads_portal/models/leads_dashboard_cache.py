@@ -0,0 +1,100 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+
+# Entries kept per worker, and how long one stays valid
+LEADS_DASHBOARD_CACHE_SIZE = 128
+LEADS_DASHBOARD_CACHE_TTL = 300
+# Database sequence bumped after every commit changing leads or users. Entries are
+# cached with its value, so a bump made by any worker makes them stale in all of them.
+LEADS_DASHBOARD_VERSION_SEQUENCE = 'bss_leads_portal_dashboard_version'
+
+
+class LeadsDashboardCache:
+    """Per-worker LRU cache with a time to live, holding rendered dashboard data per filter set.
+
+    Entries are only served for the data version they were computed from, see
+    :func:`get_leads_dashboard_version`.
+    """
+
+    def __init__(self, max_entries=LEADS_DASHBOARD_CACHE_SIZE, ttl=LEADS_DASHBOARD_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = self._misses = self._evictions = self._invalidations = 0
+
+    def get(self, key, version):
+        """Return the cached value of ``key``, or None when missing, expired or of another ``version``."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.monotonic() and entry[1] == version:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return entry[2]
+            if entry:
+                del self._entries[key]
+            self._misses += 1
+            return None
+
+    def put(self, key, version, value):
+        # Approximate memory use by the JSON size of the value
+        size = len(json.dumps(value, default=str))
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, version, value, size)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'approx_bytes': sum(entry[3] for entry in self._entries.values()),
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_ratio': round(self._hits / lookups, 4) if lookups else 0.0,
+                'evictions': self._evictions,
+                'invalidations': self._invalidations,
+            }
+
+
+leads_dashboard_cache = LeadsDashboardCache()
+
+
+def create_leads_dashboard_version(cr):
+    cr.execute(f"CREATE SEQUENCE IF NOT EXISTS {LEADS_DASHBOARD_VERSION_SEQUENCE}")
+
+
+def get_leads_dashboard_version(cr):
+    """Current data version of the dashboard, shared by all workers."""
+    cr.execute(f"SELECT last_value, is_called FROM {LEADS_DASHBOARD_VERSION_SEQUENCE}")
+    last_value, is_called = cr.fetchone()
+    return last_value if is_called else 0
+
+
+def invalidate_leads_dashboard_cache(env):
+    """Make the dashboard cache stale in every worker once the current transaction commits."""
+    postcommit = env.cr.postcommit
+    if postcommit.data.get('leads_dashboard_cache_clear'):
+        return
+    postcommit.data['leads_dashboard_cache_clear'] = True
+    registry = env.registry
+
+    def bump_version():
+        # Sequences are not transactional, the bump is seen by other workers at once
+        with registry.cursor() as cr:
+            cr.execute(f"SELECT nextval('{LEADS_DASHBOARD_VERSION_SEQUENCE}')")
+        leads_dashboard_cache.clear()
+
+    postcommit.add(bump_version)
@@ -0,0 +1,68 @@
+import re
+
+from odoo import api, fields, models
+
+
+class ResPartner(models.Model):
+    _inherit = 'res.partner'
+
+    contact_key = fields.Char(string='Contact Key', compute='_compute_contact_key', store=True, index=True,
+                              help="E.164 phone and lowercased email, used to find a contact again whatever "
+                                   "the formatting of the submitted phone or email.")
+
+    @api.depends('phone', 'email')
+    def _compute_contact_key(self):
+        for partner in self:
+            partner.contact_key = self._get_contact_key(partner.phone, partner.email)
+
+    @api.model
+    def _get_contact_key(self, phone, email):
+        """Normalized ``phone|email`` key of a contact, False when it has neither.
+
+        Submitted contacts come without a country, so local numbers are read in
+        the company's country for stored partners and lookups alike, whatever the
+        partner's own country.
+        """
+        phone = (phone or '').strip()
+        email = (email or '').strip().lower()
+        if phone:
+            # Numbers that cannot be parsed still match on their digits
+            phone = self.browse()._phone_format(number=phone, country=self.env.company.country_id) \
+                or re.sub(r'[^\d+]', '', phone)
+        if not phone and not email:
+            return False
+        return f'{phone}|{email}'
+
+    @api.model
+    def _find_or_create_contacts(self, contacts, cache=None):
+        """Return the partner ids of ``contacts``, ``(name, phone, email)`` tuples, in order.
+
+        Contacts are matched on their normalized phone and email with one indexed
+        search, then on their name, case insensitively, so people sharing a phone
+        or email stay apart. The missing ones are created together, once each.
+        ``cache`` maps ``(contact key, name)`` to partner ids and can be shared
+        between calls.
+        """
+        cache = cache if cache is not None else {}
+        keys = []
+        for name, phone, email in contacts:
+            contact_key = self._get_contact_key(phone, email)
+            keys.append((contact_key, (name or '').strip().lower()) if contact_key else False)
+        unknown = {key[0] for key in keys if key and key not in cache}
+        if unknown:
+            for partner in self.search_read([('contact_key', 'in', list(unknown))], ['contact_key', 'name']):
+                cache.setdefault((partner['contact_key'], (partner['name'] or '').strip().lower()), partner['id'])
+
+        vals_by_key = {}
+        keyless_vals = []
+        for key, (name, phone, email) in zip(keys, contacts):
+            vals = {'name': name, 'phone': phone, 'email': email}
+            if not key:
+                # Contacts without phone or email cannot be matched and are always created
+                keyless_vals.append(vals)
+            elif key not in cache:
+                vals_by_key.setdefault(key, vals)
+        partner_ids = self.create(list(vals_by_key.values()) + keyless_vals).ids
+        cache.update(zip(vals_by_key, partner_ids))
+        keyless_ids = iter(partner_ids[len(vals_by_key):])
+        return [cache[key] if key else next(keyless_ids) for key in keys]
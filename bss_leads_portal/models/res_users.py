@@ -0,0 +1,22 @@
+from odoo import api, models
+
+from .leads_dashboard_cache import invalidate_leads_dashboard_cache
+
+
+class ResUsers(models.Model):
+    _inherit = 'res.users'
+
+    # The dashboard caches the salesperson dropdown and filters on user_id
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        invalidate_leads_dashboard_cache(self.env)
+        return super().create(vals_list)
+
+    def write(self, vals):
+        invalidate_leads_dashboard_cache(self.env)
+        return super().write(vals)
+
+    def unlink(self):
+        invalidate_leads_dashboard_cache(self.env)
+        return super().unlink()
@@ -0,0 +1 @@
+from . import crm_lead_import_wizard
@@ -0,0 +1,91 @@
+import base64
+import csv
+import io
+import json
+import logging
+
+from odoo import models, fields, api
+from odoo.exceptions import UserError
+
+_logger = logging.getLogger(__name__)
+
+
+class CrmLeadImportWizard(models.TransientModel):
+    _name = 'crm.lead.import.wizard'
+    _description = 'Import Leads'
+
+    import_file = fields.Binary(string='File', required=True,
+                                help="CSV or NDJSON file with one lead per row, using the lead form's field names.")
+    import_filename = fields.Char(string='File Name')
+    file_format = fields.Selection([
+        ('csv', 'CSV'),
+        ('ndjson', 'NDJSON'),
+    ], string='Format', compute='_compute_file_format', store=True, readonly=False, required=True)
+    batch_size = fields.Integer(string='Batch Size', default=500,
+                                help="Number of leads created per create() call.")
+
+    state = fields.Selection([('draft', 'Draft'), ('done', 'Done')], default='draft')
+    rows_total = fields.Integer(string='Rows Read', readonly=True)
+    rows_created = fields.Integer(string='Leads Created', readonly=True)
+    rows_failed = fields.Integer(string='Rows Failed', readonly=True)
+    rows_per_second = fields.Float(string='Rows / Second', digits=(16, 1), readonly=True)
+    error_log = fields.Text(string='Errors', readonly=True)
+
+    @api.depends('import_filename')
+    def _compute_file_format(self):
+        for wizard in self:
+            filename = (wizard.import_filename or '').lower()
+            if filename.endswith(('.ndjson', '.jsonl', '.json')):
+                wizard.file_format = 'ndjson'
+            else:
+                wizard.file_format = wizard.file_format or 'csv'
+
+    def action_import(self):
+        self.ensure_one()
+        if not self.import_file:
+            raise UserError("Please upload a file to import.")
+        if self.batch_size <= 0:
+            raise UserError("Batch size must be greater than zero.")
+
+        lines = io.TextIOWrapper(io.BytesIO(base64.b64decode(self.import_file)), encoding='utf-8-sig')
+        stats = self.env['crm.lead'].sudo()._import_web_form_stream(
+            iter_lead_rows(lines, self.file_format), self.batch_size)
+        self.write({
+            'state': 'done',
+            'rows_total': stats['rows_total'],
+            'rows_created': stats['rows_created'],
+            'rows_failed': stats['rows_failed'],
+            'rows_per_second': stats['rows_per_second'],
+            'error_log': '\n'.join(f"Row {row_no}: {message}" for row_no, message in stats['errors']),
+        })
+        return {
+            'type': 'ir.actions.act_window',
+            'name': 'Import Leads',
+            'res_model': self._name,
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
+        }
+
+
+def iter_lead_rows(lines, file_format):
+    """Yield ``(row_no, row)`` pairs from an iterable of CSV or NDJSON text lines, one line at a time."""
+    if file_format == 'ndjson':
+        for row_no, line in enumerate(lines, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                row = {'__error__': f"Invalid JSON: {e}"}
+            if not isinstance(row, dict):
+                row = {'__error__': "Each line must be a JSON object."}
+            yield row_no, row
+    else:
+        reader = csv.DictReader(lines)
+        if 'contact_opportunity' not in (reader.fieldnames or []):
+            raise UserError("Missing required column: contact_opportunity")
+        # Row 1 is the header line
+        for row_no, row in enumerate(reader, start=2):
+            yield row_no, row
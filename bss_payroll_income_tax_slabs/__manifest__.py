@@ -13,7 +13,9 @@
         'wizard/compute_income_tax_wizard_view.xml',
         'data/compute_income_tax_server_action_view.xml',
         'data/tax_slab_2025.xml',
+        'data/income_tax_run_data.xml',
         'views/payroll_income_tax_slab_views.xml',
+        'views/income_tax_run_views.xml',
         'views/hr_contract_inherit_views.xml',
     ], 'images': ['static/description/icon.png'],
 
@@ -1,2 +1,3 @@
 from . import payroll_income_tax_slabs
-from . import hr_contract_inherit
\ No newline at end of file
+from . import hr_contract_inherit
+from . import income_tax_run
\ No newline at end of file
@@ -0,0 +1,164 @@
+import logging
+import time
+
+from odoo import Command, api, fields, models
+from odoo.exceptions import UserError
+
+_logger = logging.getLogger(__name__)
+
+# Contracts computed and committed together
+RUN_CHUNK_SIZE = 1000
+# Seconds a single cron run keeps working before handing over to the next one
+RUN_CRON_TIME_BUDGET = 50
+
+
+class IncomeTaxRun(models.Model):
+    _name = 'income.tax.run'
+    _description = 'Income Tax Background Run'
+    _order = 'id desc'
+
+    name = fields.Char(string='Description', required=True, readonly=True)
+    slab_id = fields.Many2one('tax.slab', string='Tax Slab', required=True, readonly=True, ondelete='restrict')
+    user_id = fields.Many2one('res.users', string='Started By', default=lambda self: self.env.user,
+                              required=True, readonly=True)
+    apply_to_all = fields.Boolean(string='All Running Contracts', readonly=True)
+    contract_ids = fields.Many2many('hr.contract', 'income_tax_run_contract_rel', 'run_id', 'contract_id',
+                                    string='Contracts', readonly=True)
+    failed_contract_ids = fields.Many2many('hr.contract', 'income_tax_run_failed_contract_rel', 'run_id',
+                                           'contract_id', string='Failed Contracts', readonly=True)
+    state = fields.Selection([
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('cancelled', 'Cancelled'),
+    ], string='Status', default='pending', required=True, readonly=True, index=True)
+    last_contract_id = fields.Integer(string='Last Contract', readonly=True,
+                                      help="Contracts are processed by id, the run resumes after this one.")
+    contract_count = fields.Integer(string='Contracts to Compute', readonly=True)
+    processed_count = fields.Integer(string='Processed', readonly=True)
+    failed_count = fields.Integer(string='Failed', readonly=True)
+    progress = fields.Float(string='Progress', compute='_compute_progress')
+    date_started = fields.Datetime(string='Started', readonly=True)
+    date_done = fields.Datetime(string='Finished', readonly=True)
+    error = fields.Text(string='Errors', readonly=True)
+
+    @api.depends('processed_count', 'contract_count')
+    def _compute_progress(self):
+        for run in self:
+            # Contracts started after the run are picked up too, so the count is only an estimate
+            run.progress = min(100.0 * run.processed_count / run.contract_count, 100.0) if run.contract_count else 0.0
+
+    @api.model
+    def _start(self, slab, contracts=None):
+        """Create a run computing ``slab`` on ``contracts``, or on every running contract, and wake up the cron."""
+        target = f"{len(contracts)} contract(s)" if contracts else "all running contracts"
+        run = self.create({
+            'name': f"{slab.name} on {target}",
+            'slab_id': slab.id,
+            'apply_to_all': not contracts,
+            'contract_ids': [Command.set(contracts.ids)] if contracts else False,
+        })
+        run.contract_count = self.env['hr.contract'].search_count(run._get_contract_domain())
+        self.env.ref('bss_payroll_income_tax_slabs.ir_cron_process_income_tax_runs').sudo()._trigger()
+        return run
+
+    def _get_contract_domain(self):
+        self.ensure_one()
+        if self.apply_to_all:
+            return [('state', '=', 'open')]
+        return [('id', 'in', self.contract_ids.ids)]
+
+    def action_cancel(self):
+        self.filtered(lambda run: run.state in ('pending', 'running')).write({'state': 'cancelled'})
+
+    def action_resume(self):
+        self.filtered(lambda run: run.state == 'cancelled').write({'state': 'pending'})
+        self.env.ref('bss_payroll_income_tax_slabs.ir_cron_process_income_tax_runs').sudo()._trigger()
+
+    def action_retry_failed(self):
+        self.ensure_one()
+        if not self.failed_contract_ids:
+            raise UserError("This run has no failed contracts.")
+        run = self._start(self.slab_id, self.failed_contract_ids)
+        return run._get_form_action()
+
+    def _get_form_action(self):
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_window',
+            'name': 'Income Tax Run',
+            'res_model': 'income.tax.run',
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'current',
+        }
+
+    @api.model
+    def _cron_process_runs(self):
+        """Work through pending runs chunk by chunk, committing after each chunk."""
+        deadline = time.monotonic() + RUN_CRON_TIME_BUDGET
+        while time.monotonic() < deadline:
+            run = self.search([('state', 'in', ('pending', 'running'))], order='id', limit=1)
+            if not run:
+                return
+            try:
+                if run.state == 'pending':
+                    run.write({'state': 'running', 'date_started': fields.Datetime.now()})
+                    self.env.cr.commit()
+                while time.monotonic() < deadline and run._process_chunk():
+                    # Pick up a cancellation made while the chunk was running
+                    run.invalidate_recordset(['state'])
+                    if run.state != 'running':
+                        break
+            except Exception as e:
+                # E.g. the starter lost access to the contracts. Stop the run so it does not
+                # block the runs after it; it can be resumed once the cause is fixed.
+                _logger.exception("Income tax run %s stopped", run.id)
+                self.env.cr.rollback()
+                run.write({'state': 'cancelled', 'error': '\n'.join(filter(None, [run.error, str(e)]))})
+                self.env.cr.commit()
+        # Out of time with work left: continue right away rather than at the next interval
+        if self.search_count([('state', 'in', ('pending', 'running'))], limit=1):
+            self.env.ref('bss_payroll_income_tax_slabs.ir_cron_process_income_tax_runs')._trigger()
+
+    def _process_chunk(self):
+        """Compute the next chunk of contracts after ``last_contract_id`` and commit, return whether one was left."""
+        self.ensure_one()
+        started = time.perf_counter()
+        contracts = self.env['hr.contract'].with_user(self.user_id).search(
+            self._get_contract_domain() + [('id', '>', self.last_contract_id)], order='id', limit=RUN_CHUNK_SIZE)
+        if not contracts:
+            self.write({'state': 'done', 'date_done': fields.Datetime.now()})
+            self.env.cr.commit()
+            _logger.info("Income tax run %s done: %d contract(s), %d failed",
+                         self.id, self.processed_count, self.failed_count)
+            return False
+
+        slab = self.slab_id.with_user(self.user_id)
+        failed, errors = self.env['hr.contract'], []
+        try:
+            with self.env.cr.savepoint():
+                slab._apply_to_contracts(contracts)
+        except Exception:
+            _logger.info("Income tax run %s: chunk after contract %s failed, computing its contracts one by one",
+                         self.id, self.last_contract_id, exc_info=True)
+            # Isolate the contracts at fault so the rest of the chunk still gets its tax
+            for contract in contracts:
+                try:
+                    with self.env.cr.savepoint():
+                        slab._apply_to_contracts(contract)
+                except Exception as e:
+                    failed |= contract
+                    errors.append(f"{contract.display_name}: {e}")
+
+        self.write({
+            'last_contract_id': contracts[-1].id,
+            'processed_count': self.processed_count + len(contracts),
+            'failed_count': self.failed_count + len(failed),
+            'failed_contract_ids': [Command.link(contract.id) for contract in failed],
+            'error': '\n'.join(filter(None, [self.error] + errors)) or False,
+        })
+        self.env.cr.commit()
+        _logger.info("Income tax run %s: %d contract(s) computed, %d failed in %.2fs",
+                     self.id, len(contracts), len(failed), time.perf_counter() - started)
+        return True
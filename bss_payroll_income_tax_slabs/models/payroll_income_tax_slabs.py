@@ -1,6 +1,69 @@
-from odoo import models, fields, api
+import bisect
+import logging
+import time
+from array import array
+from collections import defaultdict
+
+from odoo import models, fields, api, tools
 from odoo.exceptions import ValidationError
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+_logger = logging.getLogger(__name__)
+
+
+class TaxBrackets:
+    """Read-only bracket table of a tax slab, see ``tax.slab._get_brackets()``.
+
+    Brackets are half-open ``[start, end)`` ranges sorted by start, so the
+    bracket of an income is found by binary search. Overlapping brackets all
+    apply, as they always did, and are looked up with a linear scan instead.
+    """
+    __slots__ = ('starts', 'ends', 'rates', 'fixed_amounts', 'overlapping')
+
+    def __init__(self, brackets):
+        brackets = sorted(brackets, key=lambda bracket: bracket[0])
+        self.starts = array('d', [start for start, _end, _rate, _fixed in brackets])
+        self.ends = array('d', [end for _start, end, _rate, _fixed in brackets])
+        self.rates = array('d', [rate for _start, _end, rate, _fixed in brackets])
+        self.fixed_amounts = array('d', [fixed for _start, _end, _rate, fixed in brackets])
+        self.overlapping = any(next_start < end for end, next_start in zip(self.ends, self.starts[1:]))
+
+    def annual_tax(self, gross_salary):
+        if self.overlapping:
+            return sum(
+                (gross_salary - start) * rate + fixed
+                for start, end, rate, fixed in zip(self.starts, self.ends, self.rates, self.fixed_amounts)
+                if start <= gross_salary < end
+            )
+        index = bisect.bisect_right(self.starts, gross_salary) - 1
+        if index < 0 or gross_salary >= self.ends[index]:
+            return 0
+        return (gross_salary - self.starts[index]) * self.rates[index] + self.fixed_amounts[index]
+
+    def monthly_tax(self, wage):
+        """Monthly income tax of a monthly ``wage``, rounded to a whole amount."""
+        return round(self.annual_tax(wage * 12) / 12)
+
+    def monthly_taxes(self, wages):
+        """Return :meth:`monthly_tax` of every value of ``wages``, in order, as one vector when possible."""
+        if np is None or self.overlapping or not self.starts:
+            return [self.monthly_tax(wage) for wage in wages]
+        gross_salaries = np.asarray(wages, dtype=float) * 12
+        starts, ends, rates, fixed_amounts = (
+            np.frombuffer(column, dtype=float)
+            for column in (self.starts, self.ends, self.rates, self.fixed_amounts)
+        )
+        indexes = np.searchsorted(starts, gross_salaries, side='right') - 1
+        in_bracket = (indexes >= 0) & (gross_salaries < ends[indexes])
+        annual_taxes = np.where(
+            in_bracket, (gross_salaries - starts[indexes]) * rates[indexes] + fixed_amounts[indexes], 0.0)
+        # rint rounds half to even like round(), and the cast gives back plain ints
+        return np.rint(annual_taxes / 12).astype(int).tolist()
+
 
 class PayrollIncomeTaxSlab(models.Model):
     _name = 'tax.slab'
@@ -36,6 +99,54 @@ class PayrollIncomeTaxSlab(models.Model):
             summary += '</ul>'
             record.slab_lines_summary = summary if lines else '<em style="color: #888; font-style: italic;">No tax slab lines defined.</em>'
 
+    def _get_brackets(self):
+        """Return the compiled :class:`TaxBrackets` of the slab.
+
+        The table is cached per slab and rebuilt only once the slab or one of
+        its lines has been written, added or removed.
+        """
+        self.ensure_one()
+        lines = self.tax_slab_line_ids
+        version = (self.write_date, tuple(zip(lines.ids, lines.mapped('write_date'))))
+        return self._compile_brackets(self.id, version)
+
+    def _apply_to_contracts(self, contracts):
+        """Set the monthly income tax of ``contracts`` from the slab.
+
+        Wages are read in one query and taxed as one vector, and contracts are
+        written grouped by amount, skipping those already holding theirs.
+        """
+        self.ensure_one()
+        if not contracts:
+            return
+        started = time.perf_counter()
+        brackets = self._get_brackets()
+        contracts.flush_recordset(['wage', 'income_tax_amount'])
+        self.env.cr.execute("""
+            SELECT id, wage, income_tax_amount
+              FROM hr_contract
+             WHERE id IN %s
+        """, [tuple(contracts.ids)])
+        rows = self.env.cr.fetchall()
+        # Monetary columns come back as Decimal, convert them as the ORM does
+        taxes = brackets.monthly_taxes([float(wage or 0.0) for _id, wage, _tax in rows])
+        contract_ids_by_amount = defaultdict(list)
+        for (contract_id, _wage, current_tax), tax_amount in zip(rows, taxes):
+            if current_tax is None or current_tax != tax_amount:
+                contract_ids_by_amount[tax_amount].append(contract_id)
+        for tax_amount, contract_ids in contract_ids_by_amount.items():
+            contracts.browse(contract_ids).write({'income_tax_amount': tax_amount})
+        _logger.info("Income tax: %d contract(s) computed with %s, %d updated in %d group(s) in %.2fs",
+                     len(rows), self.name, sum(map(len, contract_ids_by_amount.values())),
+                     len(contract_ids_by_amount), time.perf_counter() - started)
+
+    @tools.ormcache('slab_id', 'version')
+    def _compile_brackets(self, slab_id, version):
+        return TaxBrackets([
+            (line.year_start_limit, line.year_end_limit, line.tax_rate, line.fixed_amount)
+            for line in self.browse(slab_id).tax_slab_line_ids
+        ])
+
 
 class PayrollIncomeTaxSlabLine(models.Model):
     _name = 'tax.slab.line'
@@ -0,0 +1,116 @@
+import unittest
+from unittest.mock import patch
+
+from odoo.tests import TransactionCase, tagged
+
+from odoo.addons.bss_payroll_income_tax_slabs.models import payroll_income_tax_slabs
+from odoo.addons.bss_payroll_income_tax_slabs.models.payroll_income_tax_slabs import TaxBrackets
+
+
+def reference_monthly_tax(wage, lines):
+    """The per-contract loop the compiled brackets replaced, kept as the reference."""
+    gross_salary = wage * 12
+    tax_amount = 0
+    for start, end, rate, fixed in sorted(lines):
+        if gross_salary >= start and gross_salary < end:
+            tax_amount += ((gross_salary - start) * rate) + fixed
+    return round(tax_amount / 12)
+
+
+# Brackets with a gap (1200 to 1500) and nothing above 3000
+SLAB_LINES = [
+    (0.0, 120.0, 1.0, 0.0),
+    (120.0, 1200.0, 2.0, 6.0),
+    (1500.0, 3000.0, 0.5, 100.0),
+]
+OVERLAPPING_SLAB_LINES = [
+    (0.0, 100.0, 1.0, 0.0),
+    (50.0, 200.0, 2.0, 5.0),
+]
+WAGES = [
+    # Outside every bracket: below, in the gap, at and above the top
+    -1.0, 100.0, 110.0, 250.0, 1000.0,
+    # Bracket edges: gross salary on a start limit, just below and just above it
+    0.0, 10.0, 125.0, 9.999, 10.001, 124.999,
+    # Monthly tax landing on x.5, rounded half to even
+    0.5, 1.5, 2.5, 3.5, 4.5,
+    # Plain values inside the brackets
+    5.25, 42.0, 99.0, 180.0, 249.99,
+]
+
+
+@tagged('post_install', '-at_install')
+class TestIncomeTax(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.slab = cls.env['tax.slab'].create({
+            'name': 'Test Slab',
+            'tax_slab_line_ids': [(0, 0, {
+                'year_start_limit': start,
+                'year_end_limit': end,
+                'tax_rate': rate,
+                'fixed_amount': fixed,
+            }) for start, end, rate, fixed in SLAB_LINES],
+        })
+
+    def test_bisect_lookup_matches_reference(self):
+        for lines in (SLAB_LINES, OVERLAPPING_SLAB_LINES, []):
+            brackets = TaxBrackets(lines)
+            for wage in WAGES:
+                with self.subTest(lines=lines, wage=wage):
+                    self.assertEqual(brackets.monthly_tax(wage), reference_monthly_tax(wage, lines))
+
+    def test_compiled_slab_matches_reference(self):
+        brackets = self.slab._get_brackets()
+        self.assertFalse(brackets.overlapping)
+        for wage in WAGES:
+            with self.subTest(wage=wage):
+                self.assertEqual(brackets.monthly_tax(wage), reference_monthly_tax(wage, SLAB_LINES))
+
+    def test_compiled_slab_follows_line_changes(self):
+        self.assertEqual(self.slab._get_brackets().monthly_tax(42.0), 42)
+        self.slab.tax_slab_line_ids.filtered(lambda line: line.year_start_limit == 120.0).unlink()
+        self.assertEqual(self.slab._get_brackets().monthly_tax(42.0), 0)
+
+    def test_monthly_taxes_fallback_matches_monthly_tax(self):
+        for lines in (SLAB_LINES, OVERLAPPING_SLAB_LINES, []):
+            brackets = TaxBrackets(lines)
+            with patch.object(payroll_income_tax_slabs, 'np', None):
+                self.assertEqual(brackets.monthly_taxes(WAGES), [brackets.monthly_tax(wage) for wage in WAGES])
+
+    @unittest.skipIf(payroll_income_tax_slabs.np is None, "numpy is not installed")
+    def test_monthly_taxes_vectorized_matches_monthly_tax(self):
+        brackets = TaxBrackets(SLAB_LINES)
+        taxes = brackets.monthly_taxes(WAGES)
+        self.assertEqual(taxes, [brackets.monthly_tax(wage) for wage in WAGES])
+        self.assertTrue(all(type(tax) is int for tax in taxes))
+
+    def test_apply_to_contracts_skips_unchanged(self):
+        wages = [42.0, 180.0, 110.0]
+        employees = self.env['hr.employee'].create([{'name': f'Tax Test {index}'} for index in range(len(wages))])
+        contracts = self.env['hr.contract'].create([{
+            'name': employee.name,
+            'employee_id': employee.id,
+            'wage': wage,
+        } for employee, wage in zip(employees, wages)])
+
+        self.slab._apply_to_contracts(contracts)
+        self.assertEqual(contracts.mapped('income_tax_amount'),
+                         [reference_monthly_tax(wage, SLAB_LINES) for wage in wages])
+
+        contracts[1].wage = 249.99
+        contract_class = type(self.env['hr.contract'])
+        original_write = contract_class.write
+        written = []
+
+        def write(records, vals):
+            if 'income_tax_amount' in vals:
+                written.extend(records.ids)
+            return original_write(records, vals)
+
+        with patch.object(contract_class, 'write', write):
+            self.slab._apply_to_contracts(contracts)
+        self.assertEqual(written, contracts[1].ids)
+        self.assertEqual(contracts[1].income_tax_amount, reference_monthly_tax(249.99, SLAB_LINES))
@@ -9,22 +9,29 @@ class ComputeIncomeTaxWizard(models.TransientModel):
     slab_id = fields.Many2one('tax.slab', required=True, readonly=False)
     contract_ids = fields.Many2many('hr.contract', string='Contracts',
                                     default=lambda self: self.env.context.get('active_ids', []))
+    apply_to_all = fields.Boolean(string='All Running Contracts',
+                                  help="Compute every running contract instead of the selected ones.")
+
+    def _check_selection(self):
+        self.ensure_one()
+        if not self.slab_id:
+            raise UserError("Please select a tax slab.")
+        if not self.apply_to_all and not self.contract_ids:
+            raise UserError("No contracts selected to compute income tax.")
 
     def action_confirm(self):
         for wizard in self:
-            if not wizard.slab_id:
-                raise UserError("Please select a tax slab.")
-            if not wizard.contract_ids:
-                raise UserError("No contracts selected to compute income tax.")
+            wizard._check_selection()
+            contracts = wizard.contract_ids
+            if wizard.apply_to_all:
+                contracts = self.env['hr.contract'].search([('state', '=', 'open')])
+            wizard.slab_id._apply_to_contracts(contracts)
 
-            for contract in wizard.contract_ids:
-                tax_amount = self.calculate_income_tax(contract.wage, wizard.slab_id)
-                contract.write({'income_tax_amount': tax_amount})
+    def action_run_in_background(self):
+        self._check_selection()
+        # A run on all contracts looks them up itself, chunk by chunk
+        run = self.env['income.tax.run']._start(self.slab_id, None if self.apply_to_all else self.contract_ids)
+        return run._get_form_action()
 
     def calculate_income_tax(self, wage, tax_slab):
-        gross_salary = wage * 12
-        tax_amount = 0
-        for line in tax_slab.tax_slab_line_ids:
-            if gross_salary >= line.year_start_limit and gross_salary < line.year_end_limit:
-                tax_amount += ((gross_salary - line.year_start_limit) * line.tax_rate) + line.fixed_amount
-        return round(tax_amount / 12)
\ No newline at end of file
+        return tax_slab._get_brackets().monthly_tax(wage)